@@ -1,15 +1,22 @@
+import contextlib
+import io
 import time
-from random import randint
+from random import Random
 from typing import List
-import matplotlib.pyplot as plt
+
+import egalitarian_allocation as allocation
+from egalitarian_allocation import find_optimize_value, find_pessimistic_value, suffix_sums
+from max_mul_values import max_mul_values
 
 def plot_running_time(max_length: int):
+    import matplotlib.pyplot as plt
+
     values_lengths = list(range(1, max_length + 1))
 
     # Lists to store running times for each scenario
     running_times_p1 = []
-    # running_times_p2 = []
-    # running_times_both = []
+    running_times_p2 = []
+    running_times_both = []
     running_times_none = []
 
     for length in values_lengths:
@@ -18,31 +25,31 @@ def plot_running_time(max_length: int):
         values2 = [2.0] * length
 
         # Run scenarios and measure running time
-        start_time = time.time()
+        start_time = time.perf_counter()
         egalitarian_allocation(values1, values2,False,False)
-        end_time = time.time()
+        end_time = time.perf_counter()
         running_times_none.append(end_time - start_time)
 
-        start_time = time.time()
+        start_time = time.perf_counter()
         egalitarian_allocation(values1, values2,True,False)
-        end_time = time.time()
+        end_time = time.perf_counter()
         running_times_p1.append(end_time - start_time)
 
-        # start_time = time.time()
-        # egalitarian_allocation(values1, values2,False,True)
-        # end_time = time.time()
-        # running_times_p2.append(end_time - start_time)
-        #
-        # start_time = time.time()
-        # egalitarian_allocation(values1, values2,True,True)
-        # end_time = time.time()
-        # running_times_both.append(end_time - start_time)
+        start_time = time.perf_counter()
+        egalitarian_allocation(values1, values2,False,True)
+        end_time = time.perf_counter()
+        running_times_p2.append(end_time - start_time)
+
+        start_time = time.perf_counter()
+        egalitarian_allocation(values1, values2,True,True)
+        end_time = time.perf_counter()
+        running_times_both.append(end_time - start_time)
 
     # Plotting
     plt.plot(values_lengths, running_times_none, label='Without Pruning')
     plt.plot(values_lengths, running_times_p1, label='With Pruning1')
-    # plt.plot(values_lengths, running_times_p2, label='With Pruning2')
-    # plt.plot(values_lengths, running_times_both, label='With Pruning1 and Pruning2')
+    plt.plot(values_lengths, running_times_p2, label='With Pruning2')
+    plt.plot(values_lengths, running_times_both, label='With Pruning1 and Pruning2')
 
     plt.title("Running Time vs Number Of Items")
     plt.xlabel("Number Of Items")
@@ -51,12 +58,97 @@ def plot_running_time(max_length: int):
     plt.show()
 
 
+def plot_states_growth(max_length: int, seed: int = 0):
+    """
+    Show how the number of situations and the running time grow with the number of items
+    when duplicate situations are removed by pruning1.
+
+    Item values are random integers, so many (value0, value1) pairs collide like in real inputs.
+    """
+    import matplotlib.pyplot as plt
+
+    rng = Random(seed)
+    values_lengths = list(range(1, max_length + 1))
+
+    states_counts = []
+    running_times = []
+
+    for length in values_lengths:
+        values1 = [float(rng.randint(1, 10)) for _ in range(length)]
+        values2 = [float(rng.randint(1, 10)) for _ in range(length)]
+
+        start_time = time.perf_counter()
+        situations = egalitarian_allocation(values1, values2, True, False)
+        end_time = time.perf_counter()
+
+        states_counts.append(sum(len(layer) for layer in situations))
+        running_times.append(end_time - start_time)
+
+    fig, (states_axis, time_axis) = plt.subplots(1, 2, figsize=(10, 4))
+
+    states_axis.plot(values_lengths, states_counts)
+    states_axis.set_title("Situations vs Number Of Items")
+    states_axis.set_xlabel("Number Of Items")
+    states_axis.set_ylabel("Number Of Situations")
+
+    time_axis.plot(values_lengths, running_times)
+    time_axis.set_title("Running Time vs Number Of Items")
+    time_axis.set_xlabel("Number Of Items")
+    time_axis.set_ylabel("Running Time (seconds)")
+
+    plt.tight_layout()
+    plt.show()
+
+
+def plot_engine_speedup(max_length: int, seed: int = 0):
+    """
+    Compare the running time of the NumPy engine with the pure-Python engine,
+    for egalitarian_allocation and max_mul_values, and plot the speedup per number of items.
+    """
+    import matplotlib.pyplot as plt
+
+    rng = Random(seed)
+    values_lengths = list(range(1, max_length + 1))
+
+    speedups_egalitarian = []
+    speedups_mul = []
+
+    for length in values_lengths:
+        values1 = [float(rng.randint(1, 100)) for _ in range(length)]
+        values2 = [float(rng.randint(1, 100)) for _ in range(length)]
+
+        running_times = {}
+        for name, algorithm in (("egalitarian", allocation.egalitarian_allocation), ("mul", max_mul_values)):
+            for engine in ("python", "numpy"):
+                # The allocation itself is printed by the algorithm, only the timings are wanted here
+                with contextlib.redirect_stdout(io.StringIO()):
+                    start_time = time.perf_counter()
+                    algorithm(values1, values2, engine=engine)
+                    end_time = time.perf_counter()
+                running_times[name, engine] = end_time - start_time
+
+        speedups_egalitarian.append(running_times["egalitarian", "python"] / running_times["egalitarian", "numpy"])
+        speedups_mul.append(running_times["mul", "python"] / running_times["mul", "numpy"])
+        print(f"{length} items: egalitarian x{speedups_egalitarian[-1]:.2f}, mul x{speedups_mul[-1]:.2f}")
+
+    plt.plot(values_lengths, speedups_egalitarian, label='egalitarian_allocation')
+    plt.plot(values_lengths, speedups_mul, label='max_mul_values')
+
+    plt.title("NumPy Engine Speedup vs Number Of Items")
+    plt.xlabel("Number Of Items")
+    plt.ylabel("Speedup (python time / numpy time)")
+    plt.legend()
+    plt.show()
+
+
 def egalitarian_allocation(values1: List[float], values2: List[float],do_pruning1,do_pruning2):
 
     # Initialize variables
     start = [0, 0, [], []]
     situations = [[start]]
-    pessimistic_value,pessimistic_situation = find_pessimistic_value(start.copy(), values1, values2)
+    suffix_values1 = suffix_sums(values1)
+    suffix_values2 = suffix_sums(values2)
+    pessimistic_value, pessimistic_situation = find_pessimistic_value([0, 0, [], []], values1, values2)
 
     # Populate situations
     for i in range(len(values1)):
@@ -77,16 +169,16 @@ def egalitarian_allocation(values1: List[float], values2: List[float],do_pruning
             ]
 
             new_situations.extend([new_situation1, new_situation2])
-            if do_pruning2:
-                pruning2(new_situations, values1, values2, new_situation1, i, pessimistic_value)
-                pruning2(new_situations, values1, values2, new_situation2, i, pessimistic_value)
 
-            if do_pruning1:
-                pruning1(new_situations)
-        if len(new_situations) == 0:
-            situations.append([pessimistic_situation])
-        else:
-            situations.append(new_situations)
+        if do_pruning2:
+            pruning2(new_situations, suffix_values1, suffix_values2, i + 1, pessimistic_value)
+        if do_pruning1:
+            pruning1(new_situations)
+        situations.append(new_situations)
+
+    if len(situations[len(values1)]) == 0:
+        # No situation can beat the greedy allocation, so it is optimal
+        situations[len(values1)].append(pessimistic_situation)
 
     min_max_value = max(situations[len(values1)], key=lambda situation: min(situation[0:2]))
 
@@ -96,48 +188,23 @@ def egalitarian_allocation(values1: List[float], values2: List[float],do_pruning
     print(f"Player 0 gets items {items_player_0} with value of {min_max_value[0]}")
     print(f"Player 1 gets items {items_player_1} with value of {min_max_value[1]}")
 
+    return situations
 
-def pruning1(situations):
-    i = 0
-    while i < len(situations) - 1:
-        j = i + 1
-        while j < len(situations):
-            if situations[i][0:2] == situations[j][0:2]:
-                situations.pop(j)
-            else:
-                j += 1
-        i += 1
-
-
-def pruning2(situations: list[list[float]], values1: list[float], values2: list[float], situation, index, pessimistic_value):
-    opt_situation = situation.copy()  # Create a copy of the situation
-    if find_optimize_value(opt_situation.copy(), values1, values2, index+1) <= pessimistic_value:
-        situations.pop(situations.index(situation))
-
-
-def find_pessimistic_value(situation, values1: List[float], values2: List[float]):
-    for i in range(0, len(values1)):
-
-        # Randomly decide which player receives the item
-        chosen_player = randint(0, 1)
-
-        # Update the situation based on the chosen player
-        if chosen_player == 0:
-            situation[0] += values1[i]
-        else:
-            situation[1] += values2[i]
-
-    return min(situation[0], situation[1]), situation
 
+def pruning1(situations):
+    unique_situations = {}
+    for situation in situations:
+        unique_situations.setdefault((situation[0], situation[1]), situation)
+    situations[:] = unique_situations.values()
 
-def find_optimize_value(situation, values1: List[float], values2: List[float], index):
-    for i in range(index, len(values1)):
-        situation[0] += values1[i]
-        situation[1] += values2[i]
 
-    return min(50, situation[1])
+def pruning2(situations, suffix_values1: List[float], suffix_values2: List[float], index, pessimistic_value):
+    situations[:] = [situation for situation in situations
+                     if find_optimize_value(situation, suffix_values1, suffix_values2, index) > pessimistic_value]
 
 
 if __name__ == "__main__":
     max_length_to_test = 20
     plot_running_time(max_length_to_test)
+    plot_states_growth(max_length_to_test)
+    plot_engine_speedup(max_length_to_test)
@@ -0,0 +1,197 @@
+import operator
+import time
+from typing import Callable, Iterator, List, Optional, Tuple
+
+if __package__:
+    from .egalitarian_allocation import pruning1, suffix_sums
+    from .state_store import StateStore
+else:
+    from egalitarian_allocation import pruning1, suffix_sums
+    from state_store import StateStore
+
+
+def iter_egalitarian_allocation(values1: List[float], values2: List[float], deadline: Optional[float] = None,
+                                node_budget: Optional[int] = None) \
+        -> Iterator[Tuple[List[int], List[int], float, float]]:
+    """
+    Search the egalitarian allocation layer by layer, and yield every improving allocation as soon as it is found.
+
+    Every yield is (items0, items1, value, bound): the items of each player, the egalitarian value of
+    the allocation, and a proven upper bound on the optimal value. The last yield is the best allocation
+    found. Its bound equals its value when the search finished, and it is looser when the search stopped early
+    because of the deadline or the node budget.
+
+    Args:
+        values1 (List[float]): List of values representing the utility of items for Player 0.
+        values2 (List[float]): List of values representing the utility of items for Player 1.
+        deadline (Optional[float]): Seconds the search may take. It stops before a layer that would end
+            after the deadline, estimating that every layer takes twice as long as the one before.
+        node_budget (Optional[int]): Number of situations after which the search stops, checked after every layer.
+
+    Examples:
+        >>> for items0, items1, value, bound in iter_egalitarian_allocation([1.0, 4.0, 3.0], [6.0, 4.0, 6.0]):
+        ...     print(items0, items1, value, bound)
+        [0, 1] [2] 5.0 8.0
+        [1, 2] [0] 6.0 7.0
+        [1, 2] [0] 6.0 6.0
+    """
+    suffix_values1 = suffix_sums(values1)
+    suffix_values2 = suffix_sums(values2)
+    suffix_best_values = suffix_sums([max(value1, value2) for value1, value2 in zip(values1, values2)])
+
+    def bound(value0: float, value1: float, index: int) -> float:
+        # Like find_optimize_value, and the poorer player cannot get more than the average
+        average_bound = (value0 + value1 + suffix_best_values[index]) / 2
+        return min(value0 + suffix_values1[index], value1 + suffix_values2[index], average_bound)
+
+    return anytime_search(values1, values2, min, bound, deadline, node_budget)
+
+
+def iter_max_mul_values(values1: List[float], values2: List[float], deadline: Optional[float] = None,
+                        node_budget: Optional[int] = None) \
+        -> Iterator[Tuple[List[int], List[int], float, float]]:
+    """
+    Anytime search of the allocation that maximizes the product of the values of the two players (the Nash
+    welfare of nash_welfare_allocation), where the value of a player is the sum of the values of its items.
+    It yields like iter_egalitarian_allocation, with the product as the value. The values must not be negative.
+
+    Examples:
+        >>> list(iter_max_mul_values([1.0, 4.0, 3.0], [6.0, 4.0, 6.0]))[-1]
+        ([1], [0, 2], 48.0, 48.0)
+    """
+    suffix_values1 = suffix_sums(values1)
+    suffix_values2 = suffix_sums(values2)
+    suffix_best_values = suffix_sums([max(value1, value2) for value1, value2 in zip(values1, values2)])
+
+    def bound(value0: float, value1: float, index: int) -> float:
+        # Every player gets at most all the remaining items, and the product of two values
+        # with a bounded sum is the largest when they are equal
+        half_total = (value0 + value1 + suffix_best_values[index]) / 2
+        return min((value0 + suffix_values1[index]) * (value1 + suffix_values2[index]), half_total * half_total)
+
+    return anytime_search(values1, values2, operator.mul, bound, deadline, node_budget)
+
+
+def anytime_allocation(values1: List[float], values2: List[float], objective: str = "egalitarian",
+                       deadline: Optional[float] = None, node_budget: Optional[int] = None) \
+        -> Tuple[List[int], List[int], float, float]:
+    """
+    Run an anytime search to its end or to its limits, and return the best allocation found.
+
+    Args:
+        values1 (List[float]): List of values representing the utility of items for Player 0.
+        values2 (List[float]): List of values representing the utility of items for Player 1.
+        objective (str): "egalitarian" for egalitarian_allocation, or "max_mul" for the product of the values
+            of the players, like nash_welfare_allocation.
+        deadline (Optional[float]): Seconds after which the search stops.
+        node_budget (Optional[int]): Number of situations after which the search stops.
+
+    Returns:
+        Tuple[List[int], List[int], float, float]: Items of Player 0, items of Player 1, the value of the allocation
+        and its optimality gap (the bound minus the value, 0 when the allocation is proven optimal).
+
+    Examples:
+        >>> anytime_allocation([1.0, 4.0, 3.0], [6.0, 4.0, 6.0])
+        ([1, 2], [0], 6.0, 0.0)
+        >>> anytime_allocation([1.0, 4.0, 3.0], [6.0, 4.0, 6.0], node_budget=1)
+        ([1, 2], [0], 6.0, 1.0)
+    """
+    if objective == "egalitarian":
+        search = iter_egalitarian_allocation(values1, values2, deadline, node_budget)
+    elif objective == "max_mul":
+        search = iter_max_mul_values(values1, values2, deadline, node_budget)
+    else:
+        raise ValueError(f"Unknown objective: {objective}")
+
+    for items0, items1, value, bound in search:
+        pass
+    return items0, items1, value, max(0.0, bound - value)
+
+
+def anytime_search(values1: List[float], values2: List[float], objective: Callable[[float, float], float],
+                   bound: Callable[[float, float, int], float], deadline: Optional[float],
+                   node_budget: Optional[int]) \
+        -> Iterator[Tuple[List[int], List[int], float, float]]:
+    """
+    The layered search of the two-player allocations, with an incumbent that improves while the search goes.
+    The value of a player is the sum of the values of its items, and the value of an allocation is
+    objective(value0, value1), like min for the egalitarian allocation.
+
+    After every layer, the situation with the best bound is completed greedily, and the completion becomes
+    the incumbent if it is better. Situations whose bound cannot beat the incumbent are removed, like pruning2
+    does with the greedy allocation, and the best bound of the remaining situations bounds the optimum.
+    """
+    start_time = time.perf_counter()
+    num_items = len(values1)
+    order = sorted(range(num_items), key=lambda i: values1[i] + values2[i], reverse=True)
+
+    def complete(value0: float, value1: float, items0: List[int], items1: List[int], index: int):
+        # Hand out the items from index on, each to the player that keeps the poorer player richest
+        items0, items1 = list(items0), list(items1)
+        for i in order:
+            if i < index:
+                continue
+            given0, given1 = value0 + values1[i], value1 + values2[i]
+            if objective(given0, value1) > objective(value0, given1) or \
+                    (objective(given0, value1) == objective(value0, given1) and values1[i] >= values2[i]):
+                value0 = given0
+                items0.append(i)
+            else:
+                value1 = given1
+                items1.append(i)
+        return sorted(items0), sorted(items1), objective(value0, value1)
+
+    best_items0, best_items1, best_value = complete(0.0, 0.0, [], [], 0)
+    best_bound = max(best_value, bound(0.0, 0.0, 0))
+    yield best_items0, best_items1, best_value, best_bound
+
+    store = StateStore()
+    nodes = 1
+
+    for i in range(num_items):
+        layer_start_time = time.perf_counter()
+        store.expand(values1[i], values2[i])
+        nodes += len(store)
+
+        pruning1(store)
+        bounds = [bound(value0, value1, i + 1) for value0, value1 in zip(store.values0, store.values1)]
+        promising_states = [state for state in range(len(store)) if bounds[state] > best_value]
+        if len(promising_states) < len(store):
+            store.keep(promising_states)
+            bounds = [bounds[state] for state in promising_states]
+
+        if len(store) == 0:
+            break
+
+        most_promising = max(range(len(store)), key=bounds.__getitem__)
+        layer_bound = bounds[most_promising]
+
+        items0, items1 = store.assignment(most_promising)
+        items0, items1, value = complete(*store.values(most_promising), items0, items1, i + 1)
+        if value > best_value:
+            best_items0, best_items1, best_value = items0, items1, value
+            best_bound = max(best_value, min(best_bound, layer_bound))
+            yield best_items0, best_items1, best_value, best_bound
+        else:
+            best_bound = max(best_value, min(best_bound, layer_bound))
+
+        now = time.perf_counter()
+        out_of_time = deadline is not None and now - start_time + 2 * (now - layer_start_time) >= deadline
+        if out_of_time or (node_budget is not None and nodes >= node_budget):
+            yield best_items0, best_items1, best_value, best_bound
+            return
+
+    # Every remaining situation is a full allocation, so its bound is its value
+    if len(store) > 0:
+        best_situation = max(range(len(store)), key=lambda state: objective(*store.values(state)))
+        value = objective(*store.values(best_situation))
+        if value > best_value:
+            best_value = value
+            best_items0, best_items1 = store.assignment(best_situation)
+
+    yield best_items0, best_items1, best_value, best_value
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -1,15 +1,24 @@
-import time
-from random import randint
 from typing import List
 
+if __package__:
+    from .state_store import StateStore
+else:
+    from state_store import StateStore
 
-def egalitarian_allocation(values1: List[float], values2: List[float]):
+
+def egalitarian_allocation(values1: List[float], values2: List[float], engine: str = "python", tracer=None):
     """
     Calculate the egalitarian allocation of items between two players based on their values.
 
     Args:
         values1 (List[float]): List of values representing the utility of items for Player 0.
         values2 (List[float]): List of values representing the utility of items for Player 1.
+        engine (str): "python" to expand situations one by one, or "numpy" to expand a whole layer at once.
+            "dp" and "mitm" are the exact engines of exact_engines: a dynamic program over the sums of a player
+            with integer or fixed-point values, and a meet-in-the-middle search. "auto" chooses between them
+            (and "python" for instances too large for both) with exact_engines.choose_engine.
+        tracer: Optional tracer (see economic_algo.tracing) that gets the size of every layer, the number of
+            situations removed by each pruning, and the time of every phase.
 
     Returns:
         None: Prints the allocation results.
@@ -20,91 +29,224 @@ def egalitarian_allocation(values1: List[float], values2: List[float]):
         >>> egalitarian_allocation(values1, values2)
         Player 0 gets items 1, 2 with value of 7.0
         Player 1 gets items 0 with value of 6.0
+        >>> egalitarian_allocation(values1, values2, engine="numpy")
+        Player 0 gets items 1, 2 with value of 7.0
+        Player 1 gets items 0 with value of 6.0
+        >>> egalitarian_allocation(values1, values2, engine="dp")
+        Player 0 gets items 1, 2 with value of 7.0
+        Player 1 gets items 0 with value of 6.0
+        >>> egalitarian_allocation(values1, values2, engine="mitm")
+        Player 0 gets items 1, 2 with value of 7.0
+        Player 1 gets items 0 with value of 6.0
+        >>> egalitarian_allocation([0.5, 0.25, 0.25], [1.0, 1.0, 1.0], engine="auto")
+        Player 0 gets items 0, 1 with value of 0.75
+        Player 1 gets items 2 with value of 1.0
     """
+    if engine == "auto":
+        if __package__:
+            from .exact_engines import choose_engine
+        else:
+            from exact_engines import choose_engine
+        engine = choose_engine(values1, values2)
+
+    if engine in ("dp", "mitm"):
+        if __package__:
+            from .exact_engines import dp_allocation, mitm_allocation
+        else:
+            from exact_engines import dp_allocation, mitm_allocation
+        if tracer is not None:
+            tracer.lap(None)
+        items0, items1 = (dp_allocation if engine == "dp" else mitm_allocation)(values1, values2)
+        if tracer is not None:
+            tracer.lap(engine)
+        print_allocation(items0, items1, sum((values1[i] for i in items0), 0.0), sum((values2[i] for i in items1), 0.0))
+        return
+
+    if tracer is not None:
+        tracer.lap(None)
+
     # Initialize variables
-    start = [0, 0, [], []]
-    situations = [[start]]
-    pessimistic_value = find_pessimistic_value(start.copy(), values1, values2)
+    if engine == "numpy":
+        if __package__:
+            from .numpy_engine import NumpyStateStore, numpy_pruning1, numpy_pruning2
+        else:
+            from numpy_engine import NumpyStateStore, numpy_pruning1, numpy_pruning2
+        store, layer_pruning1, layer_pruning2 = NumpyStateStore(), numpy_pruning1, numpy_pruning2
+    else:
+        store, layer_pruning1, layer_pruning2 = StateStore(), pruning1, pruning2
+    suffix_values1 = suffix_sums(values1)
+    suffix_values2 = suffix_sums(values2)
+    pessimistic_value, pessimistic_situation = find_pessimistic_value([0, 0, [], []], values1, values2)
 
-    # Populate situations
+    if tracer is not None:
+        tracer.lap("setup")
+
+    # Populate situations, one layer per item
     for i in range(len(values1)):
-        new_situations = []
-        for j in range(len(situations[i])):
-            old_situation = situations[i][j]
-            new_situation1 = [
-                old_situation[0] + values1[i],
-                old_situation[1],
-                old_situation[2] + [i],
-                old_situation[3]
-            ]
-            new_situation2 = [
-                old_situation[0],
-                old_situation[1] + values2[i],
-                old_situation[2],
-                old_situation[3] + [i]
-            ]
+        store.expand(values1[i], values2[i])
+        if tracer is not None:
+            tracer.lap("expand")
+            expanded = len(store)
+
+        layer_pruning2(store, suffix_values1, suffix_values2, i + 1, pessimistic_value)
+        if tracer is not None:
+            tracer.lap("pruning2")
+            after_pruning2 = len(store)
+
+        layer_pruning1(store)
+        if tracer is not None:
+            tracer.lap("pruning1")
+            trace_layer(tracer, i, expanded, after_pruning2, len(store))
+
+    if len(store) == 0:
+        # No situation can beat the greedy allocation, so it is optimal
+        value_player_0, value_player_1, items0, items1 = pessimistic_situation
+    else:
+        best_situation = store.best_state()
+        value_player_0, value_player_1 = store.values(best_situation)
+        items0, items1 = store.assignment(best_situation)
+
+    print_allocation(items0, items1, value_player_0, value_player_1)
+
+
+def print_allocation(items0: List[int], items1: List[int], value_player_0: float, value_player_1: float):
+    items_player_0 = ', '.join(map(str, items0))
+    items_player_1 = ', '.join(map(str, items1))
+
+    print(f"Player 0 gets items {items_player_0} with value of {value_player_0}")
+    print(f"Player 1 gets items {items_player_1} with value of {value_player_1}")
+
+
+def trace_layer(tracer, item: int, expanded: int, after_pruning2: int, frontier: int):
+    tracer.layer(item=item, expanded=expanded, pruned_by_pruning2=expanded - after_pruning2,
+                 pruned_by_pruning1=after_pruning2 - frontier, frontier=frontier)
+    tracer.count("states_expanded", expanded)
+    tracer.count("pruned_by_pruning2", expanded - after_pruning2)
+    tracer.count("pruned_by_pruning1", after_pruning2 - frontier)
+
+
+def pruning1(store: StateStore):
+    """
+    Remove situations whose (value0, value1) pair already appeared earlier in the current layer.
+
+    The first situation of every value pair is kept, together with its item assignment.
+    The layer is indexed by a set of value pairs, so it is processed in linear time.
 
-            new_situations.extend([new_situation1, new_situation2])
-            # pruning2(new_situations, values1, values2, new_situation1, i, pessimistic_value)
-            # pruning2(new_situations, values1, values2, new_situation2, i, pessimistic_value)
-            pruning1(new_situations)
+    Args:
+        store (StateStore): Situations of the search, the current layer is updated in place.
 
+    Examples:
+        >>> store = StateStore()
+        >>> store.expand(1.0, 1.0)
+        >>> store.expand(1.0, 1.0)
+        >>> [store.values(state) for state in range(len(store))]
+        [(2.0, 0.0), (1.0, 1.0), (1.0, 1.0), (0.0, 2.0)]
+        >>> pruning1(store)
+        >>> [store.values(state) for state in range(len(store))]
+        [(2.0, 0.0), (1.0, 1.0), (0.0, 2.0)]
+        >>> store.assignment(1)
+        ([0], [1])
+    """
+    seen = set()
+    unique_states = []
+    for state, value_pair in enumerate(zip(store.values0, store.values1)):
+        if value_pair not in seen:
+            seen.add(value_pair)
+            unique_states.append(state)
 
-        situations.append(new_situations)
+    if len(unique_states) < len(store):
+        store.keep(unique_states)
 
-    min_max_value = max(situations[len(values1)], key=lambda situation: min(situation[0:2]))
 
-    items_player_0 = ', '.join(map(str, min_max_value[2]))
-    items_player_1 = ', '.join(map(str, min_max_value[3]))
+def pruning2(store: StateStore, suffix_values1: List[float], suffix_values2: List[float], index: int,
+             pessimistic_value: float):
+    """
+    Remove the situations of the current layer that cannot beat the pessimistic value.
+
+    The optimistic value of a situation gives every remaining item to both players,
+    and is read in O(1) from the suffix sums, so the whole layer is filtered in one pass.
+
+    Args:
+        store (StateStore): Situations of the search, the current layer is updated in place.
+        suffix_values1 (List[float]): Suffix sums of the values of Player 0.
+        suffix_values2 (List[float]): Suffix sums of the values of Player 1.
+        index (int): Index of the first item that is not allocated yet.
+        pessimistic_value (float): Value of an allocation that is already known.
 
-    print(f"Player 0 gets items {items_player_0} with value of {min_max_value[0]}")
-    print(f"Player 1 gets items {items_player_1} with value of {min_max_value[1]}")
+    Examples:
+        >>> store = StateStore()
+        >>> store.expand(1.0, 6.0)
+        >>> pruning2(store, suffix_sums([1.0, 4.0, 3.0]), suffix_sums([6.0, 4.0, 6.0]), 1, 7.0)
+        >>> [store.values(state) for state in range(len(store))]
+        [(1.0, 0.0)]
+    """
+    remaining_value1 = suffix_values1[index]
+    remaining_value2 = suffix_values2[index]
 
+    promising_states = [state for state, (value0, value1) in enumerate(zip(store.values0, store.values1))
+                        if min(value0 + remaining_value1, value1 + remaining_value2) > pessimistic_value]
 
-def pruning1(situations):
-    i = 0
-    while i < len(situations) - 1:
-        j = i + 1
-        while j < len(situations):
-            if situations[i][0:2] == situations[j][0:2]:
-                situations.pop(j)
-            else:
-                j += 1
-        i += 1
+    if len(promising_states) < len(store):
+        store.keep(promising_states)
 
 
-def pruning2(situations: list[list[float]], values1: list[float], values2: list[float], situation,index, pessimistic_value):
+def suffix_sums(values: List[float]) -> List[float]:
+    """
+    Calculate the sums of the values from every index to the end.
 
-   opt_situation = situation.copy()
-   if find_optimize_value(opt_situation, values1, values2, index+1) < pessimistic_value:
-       situations.pop(situations.index(situation))
+    Examples:
+        >>> suffix_sums([1.0, 4.0, 3.0])
+        [8.0, 7.0, 3.0, 0]
+    """
+    sums = [0] * (len(values) + 1)
+    for i in range(len(values) - 1, -1, -1):
+        sums[i] = sums[i + 1] + values[i]
+    return sums
 
 
 def find_pessimistic_value(situation, values1: List[float], values2: List[float]):
-    for i in range(0, len(values1)):
+    """
+    Find a lower bound on the egalitarian value with a deterministic greedy allocation.
+
+    Items are handed out from the most valuable to the least valuable (by the sum of both values),
+    each to the player with the lower value so far. Ties go to the player who values the item more.
 
-        # Randomly decide which player receives the item
-        chosen_player = randint(0, 1)
+    Args:
+        situation (list): Starting situation [value0, value1, items0, items1], updated in place.
+        values1 (List[float]): List of values representing the utility of items for Player 0.
+        values2 (List[float]): List of values representing the utility of items for Player 1.
+
+    Returns:
+        Tuple[float, list]: The egalitarian value of the greedy allocation and its situation.
+
+    Examples:
+        >>> find_pessimistic_value([0, 0, [], []], [1.0, 4.0, 3.0], [6.0, 4.0, 6.0])
+        (5.0, [5.0, 6.0, [0, 1], [2]])
+    """
+    order = sorted(range(len(values1)), key=lambda i: values1[i] + values2[i], reverse=True)
 
-        # Update the situation based on the chosen player
-        if chosen_player == 0:
+    for i in order:
+        if situation[0] < situation[1] or (situation[0] == situation[1] and values1[i] >= values2[i]):
             situation[0] += values1[i]
+            situation[2].append(i)
         else:
             situation[1] += values2[i]
+            situation[3].append(i)
 
-    return min(situation[0], situation[1])
-
-
-def find_optimize_value(situation, values1: List[float], values2: List[float], index):
-    if index == len(values1):
-        return
+    situation[2].sort()
+    situation[3].sort()
+    return min(situation[0], situation[1]), situation
 
-    for i in range(index, len(values1)):
-        situation[0] += values1[i]
-        situation[1] += values2[i]
 
+def find_optimize_value(situation, suffix_values1: List[float], suffix_values2: List[float], index):
+    """
+    Find an upper bound on the egalitarian value of a situation, giving every remaining item to both players.
 
-    return min(situation[0], situation[1])
+    Examples:
+        >>> find_optimize_value([1.0, 0, [0], []], suffix_sums([1.0, 4.0, 3.0]), suffix_sums([6.0, 4.0, 6.0]), 1)
+        8.0
+    """
+    return min(situation[0] + suffix_values1[index], situation[1] + suffix_values2[index])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,221 @@
+import math
+from bisect import bisect_left
+from typing import List, Optional, Tuple
+
+if __package__:
+    from .state_store import StateStore
+    from .egalitarian_allocation import pruning1
+else:
+    from state_store import StateStore
+    from egalitarian_allocation import pruning1
+
+# Largest number of (item, sum) cells the dynamic program may fill
+DP_MAX_CELLS = 10 ** 8
+
+# Largest memory in bytes the arrays of the dynamic program may take
+DP_MAX_BYTES = 2 ** 28
+
+# Fixed cost of a NumPy step of the dynamic program, in cells
+DP_ITEM_CELLS = 1000
+
+# Cost of one step of the meet-in-the-middle search (a Python loop iteration), in cells of the dynamic program
+MITM_STEP_CELLS = 50
+
+# Largest number of items for the meet-in-the-middle search (2^20 situations per half)
+MITM_MAX_ITEMS = 40
+
+# Largest power of 10 tried to turn fixed-point values into integers
+MAX_SCALE = 10 ** 6
+
+
+def choose_engine(values1: List[float], values2: List[float]) -> str:
+    """
+    Choose the exact engine for an instance of egalitarian_allocation.
+
+    The dynamic program needs the values of a player to be integers (or fixed-point amounts), and runs in
+    time items x (sum of these values), while the meet-in-the-middle search runs in time items x 2^(items / 2)
+    whatever the values. The dynamic program is chosen when its arrays fit in DP_MAX_BYTES and it is cheaper
+    than the meet-in-the-middle search, or, above MITM_MAX_ITEMS items, when it fills at most DP_MAX_CELLS cells.
+    Otherwise the meet-in-the-middle search is chosen up to MITM_MAX_ITEMS items, and the layered search
+    for larger instances.
+
+    Examples:
+        >>> choose_engine([1, 4, 3], [6, 4, 6])
+        'mitm'
+        >>> choose_engine([10 ** 7] * 3, [10 ** 7] * 3)
+        'mitm'
+        >>> choose_engine(list(range(1, 31)), [5] * 30)
+        'dp'
+        >>> choose_engine([0.1234567891, 1.0], [2.0, 0.987654321])
+        'mitm'
+        >>> choose_engine([0.1234567891] * 50, [0.987654321] * 50)
+        'python'
+    """
+    num_items = len(values1)
+    dp_sums = [sum(scaled[0]) for scaled in map(scaled_integers, (values1, values2)) if scaled is not None]
+
+    if dp_sums and dp_memory(num_items, min(dp_sums)) <= DP_MAX_BYTES:
+        dp_cells = num_items * (min(dp_sums) + 1 + DP_ITEM_CELLS)
+        if num_items <= MITM_MAX_ITEMS:
+            return "dp" if dp_cells <= MITM_STEP_CELLS * num_items * 2 ** (num_items / 2) else "mitm"
+        if dp_cells <= DP_MAX_CELLS:
+            return "dp"
+
+    if num_items <= MITM_MAX_ITEMS:
+        return "mitm"
+    return "python"
+
+
+def dp_memory(num_items: int, total: int) -> int:
+    """
+    Bytes taken by dp_allocation when the indexed player has values with the given sum: a bit per (item, sum)
+    cell for the choices, and a few float arrays over the sums for the step being computed.
+
+    Examples:
+        >>> dp_memory(3, 3 * 10 ** 7)
+        1230000041
+    """
+    return (total + 1) * (math.ceil(num_items / 8) + 40)
+
+
+def scaled_integers(values: List[float]) -> Optional[Tuple[List[int], int]]:
+    """
+    Turn non-negative fixed-point values into integers with the smallest power of 10 that works.
+
+    Returns:
+        Optional[Tuple[List[int], int]]: The integers and the scale, or None if the values are not fixed-point.
+
+    Examples:
+        >>> scaled_integers([1.5, 0.25, 2])
+        ([150, 25, 200], 100)
+        >>> scaled_integers([1 / 3]) is None
+        True
+    """
+    if any(value < 0 for value in values):
+        return None
+
+    scale = 1
+    while scale <= MAX_SCALE:
+        integers = [round(value * scale) for value in values]
+        if all(abs(integer - value * scale) <= 1e-9 * max(1.0, value * scale)
+               for integer, value in zip(integers, values)):
+            return integers, scale
+        scale *= 10
+    return None
+
+
+def dp_allocation(values1: List[float], values2: List[float]) -> Tuple[List[int], List[int]]:
+    """
+    Find an egalitarian allocation with a dynamic program over the sums one player can reach.
+
+    The player whose values are integers (after scaling fixed-point values) with the smaller sum is indexed:
+    best[s] is the largest value of the other player when the indexed player gets exactly s. Every item
+    updates the whole array in one NumPy step, and the choices are kept as packed bits to rebuild the items.
+
+    Returns:
+        Tuple[List[int], List[int]]: Items of Player 0 and items of Player 1.
+
+    Examples:
+        >>> dp_allocation([1, 4, 3], [6, 4, 6])
+        ([1, 2], [0])
+        >>> dp_allocation([0.5, 0.25, 0.25], [1.0, 1.0, 1.0])
+        ([0, 2], [1])
+    """
+    import numpy as np
+
+    candidates = []
+    for player, values in enumerate((values1, values2)):
+        scaled = scaled_integers(values)
+        if scaled is not None:
+            candidates.append((sum(scaled[0]), player, scaled))
+    if not candidates:
+        raise ValueError("The dp engine needs integer or fixed-point values for one of the players")
+    total, indexed_player, (integers, scale) = min(candidates)
+
+    other_values = values2 if indexed_player == 0 else values1
+
+    best = np.full(total + 1, -np.inf)
+    best[0] = 0.0
+    choices = []
+    for item, integer in enumerate(integers):
+        given_other = best + other_values[item]
+        given_indexed = np.full(total + 1, -np.inf)
+        given_indexed[integer:] = best[:total + 1 - integer]
+
+        chosen = given_indexed > given_other
+        best = np.where(chosen, given_indexed, given_other)
+        choices.append(np.packbits(chosen))
+
+    # The value of the indexed player for every sum, in the original units
+    egalitarian_values = np.minimum(np.arange(total + 1) / scale, best)
+    reached = int(np.argmax(egalitarian_values))
+
+    indexed_items, other_items = [], []
+    for item in range(len(integers) - 1, -1, -1):
+        if np.unpackbits(choices[item], count=total + 1)[reached]:
+            indexed_items.append(item)
+            reached -= integers[item]
+        else:
+            other_items.append(item)
+    indexed_items.reverse()
+    other_items.reverse()
+
+    return (indexed_items, other_items) if indexed_player == 0 else (other_items, indexed_items)
+
+
+def mitm_allocation(values1: List[float], values2: List[float]) -> Tuple[List[int], List[int]]:
+    """
+    Find an egalitarian allocation by meeting in the middle.
+
+    Both halves of the items are enumerated. The situations of the second half that are not Pareto dominated
+    are sorted by value0 - value1, and for every situation (a0, a1) of the first half the best partner is where
+    a0 + b0 stops being below a1 + b1, found by binary search. The search takes O(2^(n/2) n) time instead of 2^n.
+
+    Returns:
+        Tuple[List[int], List[int]]: Items of Player 0 and items of Player 1.
+
+    Examples:
+        >>> mitm_allocation([1.0, 4.0, 3.0], [6.0, 4.0, 6.0])
+        ([1, 2], [0])
+    """
+    half = len(values1) // 2
+    first = half_situations(values1[:half], values2[:half])
+    second = half_situations(values1[half:], values2[half:])
+
+    # The frontier of the second half: sorted by value0, keeping situations that raise value1 from the right
+    order = sorted(range(len(second)), key=lambda state: (second.values0[state], second.values1[state]))
+    frontier = []
+    best_value1 = -math.inf
+    for state in reversed(order):
+        if second.values1[state] > best_value1:
+            frontier.append(state)
+            best_value1 = second.values1[state]
+    frontier.reverse()
+    differences = [second.values0[state] - second.values1[state] for state in frontier]
+
+    best_value, best_pair = -math.inf, (0, 0)
+    for state, (value0, value1) in enumerate(zip(first.values0, first.values1)):
+        position = bisect_left(differences, value1 - value0)
+        for partner in (position - 1, position):
+            if 0 <= partner < len(frontier):
+                other = frontier[partner]
+                value = min(value0 + second.values0[other], value1 + second.values1[other])
+                if value > best_value:
+                    best_value, best_pair = value, (state, other)
+
+    first_items0, first_items1 = first.assignment(best_pair[0])
+    second_items0, second_items1 = second.assignment(best_pair[1])
+    return first_items0 + [half + item for item in second_items0], first_items1 + [half + item for item in second_items1]
+
+
+def half_situations(values1: List[float], values2: List[float]) -> StateStore:
+    store = StateStore()
+    for i in range(len(values1)):
+        store.expand(values1[i], values2[i])
+        pruning1(store)
+    return store
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
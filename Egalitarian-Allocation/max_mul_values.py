@@ -1,15 +1,20 @@
-import time
-from random import randint
+import operator
 from typing import List
-import matplotlib.pyplot as plt
 
-def max_mul_values(values1: List[float], values2: List[float]):
+if __package__:
+    from .state_store import StateStore
+else:
+    from state_store import StateStore
+
+def max_mul_values(values1: List[float], values2: List[float], engine: str = "python", tracer=None):
     """
     Calculate the allocation of items that maximizes the product of values for each player.
 
     Args:
         values1 (List[float]): List of values representing the utility of items for Player 0.
         values2 (List[float]): List of values representing the utility of items for Player 1.
+        engine (str): "python" to expand situations one by one, or "numpy" to expand a whole layer at once.
+        tracer: Optional tracer (see economic_algo.tracing) that gets the size of every layer and the expansion time.
 
     Returns:
         None: Prints the allocation results.
@@ -20,38 +25,39 @@ def max_mul_values(values1: List[float], values2: List[float]):
         >>> max_mul_values(values1, values2)
         Player 0 gets items 1, 2 with value of 7.0
         Player 1 gets items 0 with value of 6.0
+        >>> max_mul_values(values1, values2, engine="numpy")
+        Player 0 gets items 1, 2 with value of 7.0
+        Player 1 gets items 0 with value of 6.0
     """
     # Initialize variables
-    start = [1, 1, [], []]
-    situations = [[start]]
-
-    # Populate situations
+    if engine == "numpy":
+        if __package__:
+            from .numpy_engine import NumpyStateStore
+        else:
+            from numpy_engine import NumpyStateStore
+        import numpy as np
+        store, combine = NumpyStateStore(1, 1), np.multiply
+    else:
+        store, combine = StateStore(1, 1), operator.mul
+
+    if tracer is not None:
+        tracer.lap(None)
+
+    # Populate situations, one layer per item
     for i in range(len(values1)):
-        new_situations = []
-        for j in range(len(situations[i])):
-            old_situation = situations[i][j]
-            new_situation1 = [
-                old_situation[0] * values1[i],
-                old_situation[1],
-                old_situation[2] + [i],
-                old_situation[3]
-            ]
-            new_situation2 = [
-                old_situation[0],
-                old_situation[1] * values2[i],
-                old_situation[2],
-                old_situation[3] + [i]
-            ]
-
-            new_situations.extend([new_situation1, new_situation2])
-        situations.append(new_situations)
-
-    min_max_value = max(situations[len(values1)], key=lambda situation: min(situation[0:2]))
-
-    items_player0 = ', '.join(map(str, min_max_value[2]))
-    items_player1 = ', '.join(map(str, min_max_value[3]))
-
-    items_values_player0, items_values_player1 = find_items(min_max_value, values1, values2)
+        store.expand(values1[i], values2[i], combine)
+        if tracer is not None:
+            tracer.lap("expand")
+            tracer.layer(item=i, expanded=len(store), frontier=len(store))
+            tracer.count("states_expanded", len(store))
+
+    best_situation = store.best_state()
+    items0, items1 = store.assignment(best_situation)
+
+    items_player0 = ', '.join(map(str, items0))
+    items_player1 = ', '.join(map(str, items1))
+
+    items_values_player0, items_values_player1 = find_items([None, None, items0, items1], values1, values2)
 
     print(f"Player 0 gets items {items_player0} with value of {items_values_player0}")
     print(f"Player 1 gets items {items_player1} with value of {items_values_player1}")
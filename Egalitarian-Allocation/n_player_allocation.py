@@ -0,0 +1,250 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# Size of the beam search that finds the incumbent of the exact search
+INCUMBENT_FRONTIER = 64
+
+# Largest number of (situation, player, item) cells the bounds handle at once
+BOUND_CHUNK_CELLS = 2 ** 22
+
+
+def egalitarian_allocation_n_players(valuations: List[List[float]], max_frontier: Optional[int] = None):
+    """
+    Calculate the egalitarian allocation of items between any number of players based on their values.
+
+    Args:
+        valuations (List[List[float]]): valuations[i][j] is the value of item j for player i.
+        max_frontier (Optional[int]): Maximal number of situations kept per layer. When a layer is larger,
+            only the most promising situations are kept (beam search) and the optimality gap is reported.
+
+    Returns:
+        None: Prints the allocation results.
+
+    Examples:
+        >>> egalitarian_allocation_n_players([[1.0, 4.0, 3.0], [6.0, 4.0, 6.0]])
+        Player 0 gets items 1, 2 with value of 7.0
+        Player 1 gets items 0 with value of 6.0
+        >>> egalitarian_allocation_n_players([[3.0, 1.0, 2.0, 4.0], [3.0, 1.0, 2.0, 4.0], [1.0, 5.0, 1.0, 1.0]])
+        Player 0 gets items 3 with value of 4.0
+        Player 1 gets items 0, 2 with value of 5.0
+        Player 2 gets items 1 with value of 5.0
+        >>> egalitarian_allocation_n_players([[3.0, 1.0, 2.0, 4.0], [3.0, 1.0, 2.0, 4.0], [1.0, 5.0, 1.0, 1.0]], 1)
+        Player 0 gets items 3 with value of 4.0
+        Player 1 gets items 0, 2 with value of 5.0
+        Player 2 gets items 1 with value of 5.0
+        Optimality gap: 0.0
+    """
+    bundles, values, gap = find_egalitarian_allocation_n_players(valuations, max_frontier)
+
+    for player in range(len(valuations)):
+        items = ', '.join(map(str, bundles[player]))
+        print(f"Player {player} gets items {items} with value of {values[player]}")
+
+    if max_frontier is not None:
+        print(f"Optimality gap: {gap}")
+
+
+def find_egalitarian_allocation_n_players(valuations: List[List[float]], max_frontier: Optional[int] = None) \
+        -> Tuple[List[List[int]], List[float], float]:
+    """
+    Find the egalitarian allocation of items between any number of players.
+
+    The search goes over the items layer by layer like the two-player search, with a whole layer in NumPy
+    arrays. A situation is the vector of player values, with a parent index and the chosen player kept per
+    layer to rebuild the bundles. Every layer removes situations that repeat a value vector (players with
+    identical valuations are interchangeable, so their values are compared as a sorted group) and situations
+    whose optimistic value (see optimistic_values) cannot beat the incumbent. The exact search takes as
+    incumbent the result of a beam search of INCUMBENT_FRONTIER situations, which is usually optimal or close.
+
+    Args:
+        valuations (List[List[float]]): valuations[i][j] is the value of item j for player i.
+        max_frontier (Optional[int]): Maximal number of situations kept per layer (beam search). The exact
+            search still takes exponential time and memory on hard instances, and a frontier bounds both.
+
+    Returns:
+        Tuple[List[List[int]], List[float], float]: The items of every player, the value of every player,
+        and the optimality gap (the difference between an upper bound on the optimum and the value found,
+        0 when the search is exact).
+
+    Examples:
+        >>> find_egalitarian_allocation_n_players([[1.0, 1.0, 1.0], [1.0, 1.0, 1.0], [1.0, 1.0, 1.0]])
+        ([[0], [1], [2]], [1.0, 1.0, 1.0], 0.0)
+    """
+    num_players = len(valuations)
+    num_items = len(valuations[0]) if num_players else 0
+    if num_players > 256:
+        raise ValueError("At most 256 players are supported")
+
+    matrix = np.array(valuations, dtype=np.float64).reshape(num_players, num_items)
+    groups = identical_player_groups(valuations)
+    incumbent = find_pessimistic_allocation(valuations)
+
+    if max_frontier is None:
+        bundles, values, _ = layered_search(matrix, groups, incumbent, INCUMBENT_FRONTIER)
+        incumbent = (min(values) if values else 0.0), bundles
+    return layered_search(matrix, groups, incumbent, max_frontier)
+
+
+def layered_search(matrix: np.ndarray, groups: List[List[int]], incumbent: Tuple[float, List[List[int]]],
+                   max_frontier: Optional[int]) -> Tuple[List[List[int]], List[float], float]:
+    """
+    The layered search of find_egalitarian_allocation_n_players, which keeps only the situations that can beat
+    the incumbent (a value and the bundles that reach it), and at most max_frontier of them per layer.
+    """
+    num_players, num_items = matrix.shape
+    incumbent_value, incumbent_bundles = incumbent
+
+    layer = np.zeros((1, num_players))
+    parents: List[np.ndarray] = []
+    choices: List[np.ndarray] = []
+    dropped_bound = -np.inf
+    gains = np.eye(num_players)
+
+    for item in range(num_items):
+        # Situation num_players * s + p gives the item to player p in situation s
+        new_layer = (layer[:, np.newaxis, :] + gains * matrix[:, item]).reshape(-1, num_players)
+        new_parents = np.repeat(np.arange(len(layer), dtype=np.int64), num_players)
+        new_choices = np.tile(np.arange(num_players, dtype=np.uint8), len(layer))
+
+        bounds = optimistic_values(new_layer, matrix, item + 1)
+        promising = np.flatnonzero(bounds > incumbent_value)
+        kept = promising[first_occurrences(new_layer[promising], groups)]
+        new_layer, new_parents, new_choices = new_layer[kept], new_parents[kept], new_choices[kept]
+        bounds = bounds[kept]
+
+        if max_frontier is not None and len(new_layer) > max_frontier:
+            ranking = np.lexsort((-new_layer.min(axis=1), -bounds))
+            kept = np.sort(ranking[:max_frontier])
+            dropped_bound = max(dropped_bound, float(bounds[ranking[max_frontier]]))
+            new_layer, new_parents, new_choices = new_layer[kept], new_parents[kept], new_choices[kept]
+
+        layer = new_layer
+        parents.append(new_parents)
+        choices.append(new_choices)
+
+    if len(layer) == 0:
+        # No situation can beat the incumbent
+        values = [float(matrix[player, incumbent_bundles[player]].sum()) for player in range(num_players)]
+        return incumbent_bundles, values, max(0.0, dropped_bound - incumbent_value)
+
+    best_situation = int(np.argmax(layer.min(axis=1))) if num_players else 0
+    values = layer[best_situation].tolist()
+
+    bundles = [[] for _ in range(num_players)]
+    state = best_situation
+    for item in range(num_items - 1, -1, -1):
+        bundles[int(choices[item][state])].append(item)
+        state = int(parents[item][state])
+    for bundle in bundles:
+        bundle.reverse()
+
+    best_value = min(values) if values else 0.0
+    return bundles, values, max(0.0, dropped_bound - best_value)
+
+
+def identical_player_groups(valuations: List[List[float]]) -> List[List[int]]:
+    """
+    Group the players with identical valuations.
+
+    Examples:
+        >>> identical_player_groups([[1, 2], [3, 4], [1, 2]])
+        [[0, 2], [1]]
+    """
+    groups = {}
+    for player, player_values in enumerate(valuations):
+        groups.setdefault(tuple(player_values), []).append(player)
+    return list(groups.values())
+
+
+def first_occurrences(values: np.ndarray, groups: List[List[int]]) -> np.ndarray:
+    """
+    Indices of the situations (rows) that do not repeat an earlier situation, where players with identical
+    valuations are interchangeable.
+
+    Examples:
+        >>> first_occurrences(np.array([[5.0, 1.0, 2.0], [2.0, 1.0, 5.0], [2.0, 2.0, 5.0]]), [[0, 2], [1]]).tolist()
+        [0, 2]
+    """
+    keys = values.copy()
+    for group in groups:
+        if len(group) > 1:
+            keys[:, group] = np.sort(values[:, group], axis=1)
+    _, first = np.unique(keys, axis=0, return_index=True)
+    return np.sort(first)
+
+
+def optimistic_values(values: np.ndarray, matrix: np.ndarray, index: int) -> np.ndarray:
+    """
+    Upper bounds on the egalitarian value of situations (the rows of values) when the items from index on
+    are still to be given.
+
+    - No player can get more than its value plus every remaining item.
+    - The k poorest players cannot all get more than their average, where every remaining item goes to
+      whoever of them values it most (for k = n, this is the average over all players).
+    - Only as many players as there are remaining items can still gain, so some player ends with at most
+      the value of the (remaining items + 1)-th poorest player.
+
+    Examples:
+        >>> matrix = np.array([[3.0, 1.0], [3.0, 1.0], [3.0, 1.0]])
+        >>> optimistic_values(np.array([[2.0, 0.0, 0.0], [2.0, 2.0, 2.0]]), matrix, 1).tolist()
+        [0.0, 2.0]
+        >>> optimistic_values(np.array([[0.0, 0.0]]), np.array([[4.0, 1.0], [4.0, 1.0]]), 0).tolist()
+        [2.5]
+    """
+    num_situations, num_players = values.shape
+    remaining = matrix[:, index:]
+    num_remaining = remaining.shape[1]
+    if num_players == 0:
+        return np.full(num_situations, np.inf)
+
+    bounds = (values + remaining.sum(axis=1)).min(axis=1)
+
+    order = np.argsort(values, axis=1, kind='stable')
+    sorted_values = np.take_along_axis(values, order, axis=1)
+    if num_remaining < num_players:
+        bounds = np.minimum(bounds, sorted_values[:, num_remaining])
+
+    chunk = max(1, BOUND_CHUNK_CELLS // max(1, num_players * num_remaining))
+    sizes = np.arange(1, num_players + 1)
+    for start in range(0, num_situations, chunk):
+        end = min(start + chunk, num_situations)
+        best_remaining = np.maximum.accumulate(remaining[order[start:end]], axis=1).sum(axis=2)
+        poorest_bounds = (np.cumsum(sorted_values[start:end], axis=1) + best_remaining) / sizes
+        bounds[start:end] = np.minimum(bounds[start:end], poorest_bounds.min(axis=1))
+
+    return bounds
+
+
+def find_pessimistic_allocation(valuations: List[List[float]]) -> Tuple[float, List[List[int]]]:
+    """
+    Find a lower bound on the egalitarian value with a deterministic greedy allocation.
+
+    Items are handed out from the most valuable to the least valuable (by the sum of all values),
+    each to the player with the lowest value so far. Ties go to the player who values the item more.
+
+    Examples:
+        >>> find_pessimistic_allocation([[1.0, 4.0, 3.0], [6.0, 4.0, 6.0]])
+        (5.0, [[0, 1], [2]])
+    """
+    num_players = len(valuations)
+    num_items = len(valuations[0]) if num_players else 0
+
+    values = [0.0] * num_players
+    bundles = [[] for _ in range(num_players)]
+    order = sorted(range(num_items), key=lambda i: sum(player_values[i] for player_values in valuations),
+                   reverse=True)
+
+    for item in order:
+        player = min(range(num_players), key=lambda p: (values[p], -valuations[p][item]))
+        values[player] += valuations[player][item]
+        bundles[player].append(item)
+
+    for bundle in bundles:
+        bundle.sort()
+    return (min(values) if values else 0.0), bundles
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
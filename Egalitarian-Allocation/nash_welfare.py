@@ -0,0 +1,163 @@
+import math
+from typing import List, Tuple
+
+if __package__:
+    from .state_store import StateStore
+else:
+    from state_store import StateStore
+
+
+def nash_welfare_allocation(values1: List[float], values2: List[float], epsilon: float = 0.0):
+    """
+    Calculate the allocation of items that maximizes the product of the values of the two players (Nash welfare).
+
+    The value of each player is kept as the log of its sum, so large instances cannot overflow,
+    and every layer keeps only the situations that are not Pareto dominated.
+
+    Args:
+        values1 (List[float]): List of values representing the utility of items for Player 0.
+        values2 (List[float]): List of values representing the utility of items for Player 1.
+        epsilon (float): Tolerance in log space for merging close situations, 0 keeps the search exact.
+
+    Returns:
+        None: Prints the allocation results.
+
+    Examples:
+        >>> nash_welfare_allocation([1.0, 4.0, 3.0], [6.0, 4.0, 6.0])
+        Player 0 gets items 1 with value of 4.0
+        Player 1 gets items 0, 2 with value of 12.0
+        >>> nash_welfare_allocation([1e300] * 4, [1e300] * 4)
+        Player 0 gets items 0, 1 with value of 2e+300
+        Player 1 gets items 2, 3 with value of 2e+300
+    """
+    items0, items1 = find_nash_welfare_allocation(values1, values2, epsilon)
+
+    items_player0 = ', '.join(map(str, items0))
+    items_player1 = ', '.join(map(str, items1))
+
+    value_player0 = math.fsum(values1[i] for i in items0)
+    value_player1 = math.fsum(values2[i] for i in items1)
+
+    print(f"Player 0 gets items {items_player0} with value of {value_player0}")
+    print(f"Player 1 gets items {items_player1} with value of {value_player1}")
+
+
+def find_nash_welfare_allocation(values1: List[float], values2: List[float],
+                                 epsilon: float = 0.0) -> Tuple[List[int], List[int]]:
+    """
+    Find the items of each player in the allocation that maximizes the Nash welfare.
+
+    Args:
+        values1 (List[float]): List of values representing the utility of items for Player 0.
+        values2 (List[float]): List of values representing the utility of items for Player 1.
+        epsilon (float): Tolerance in log space for merging close situations, 0 keeps the search exact.
+
+    Returns:
+        Tuple[List[int], List[int]]: Items of Player 0 and items of Player 1.
+
+    Examples:
+        >>> find_nash_welfare_allocation([1.0, 4.0, 3.0], [6.0, 4.0, 6.0])
+        ([1], [0, 2])
+        >>> find_nash_welfare_allocation([1.0, 2.0, 3.0, 4.0], [1.0, 2.0, 3.0, 4.0], epsilon=0.01)
+        ([0, 3], [1, 2])
+    """
+    # log(0) stands for a player without any value yet
+    store = StateStore(-math.inf, -math.inf)
+
+    for i in range(len(values1)):
+        store.expand(log_value(values1[i]), log_value(values2[i]), log_add)
+        if epsilon > 0:
+            grid_pruning(store, epsilon)
+        dominance_pruning(store)
+
+    best_situation = max(range(len(store)), key=lambda state: sum(store.values(state)))
+    return store.assignment(best_situation)
+
+
+def dominance_pruning(store: StateStore):
+    """
+    Remove the situations of the current layer that are Pareto dominated by another situation.
+
+    The layer is sorted by the value of Player 0 (highest first), and a sweep keeps only situations
+    whose value for Player 1 is higher than every situation before them.
+
+    Args:
+        store (StateStore): Situations of the search, the current layer is updated in place.
+
+    Examples:
+        >>> store = StateStore()
+        >>> store.expand(1.0, 1.0)
+        >>> store.expand(2.0, 0.5)
+        >>> [store.values(state) for state in range(len(store))]
+        [(3.0, 0.0), (1.0, 0.5), (2.0, 1.0), (0.0, 1.5)]
+        >>> dominance_pruning(store)
+        >>> [store.values(state) for state in range(len(store))]
+        [(3.0, 0.0), (2.0, 1.0), (0.0, 1.5)]
+    """
+    values0, values1 = store.values0, store.values1
+    order = sorted(range(len(store)), key=lambda state: (-values0[state], -values1[state]))
+
+    frontier = []
+    best_value1 = -math.inf
+    for state in order:
+        if not frontier or values1[state] > best_value1:
+            frontier.append(state)
+            best_value1 = values1[state]
+
+    if len(frontier) < len(store):
+        store.keep(frontier)
+
+
+def grid_pruning(store: StateStore, epsilon: float):
+    """
+    Merge the situations of the current layer that fall in the same epsilon-sized cell,
+    keeping the situation with the highest Nash welfare in every cell.
+
+    Examples:
+        >>> store = StateStore()
+        >>> store.expand(1.0, 1.0)
+        >>> store.expand(1.0, 1.01)
+        >>> grid_pruning(store, 0.5)
+        >>> [store.values(state) for state in range(len(store))]
+        [(2.0, 0.0), (1.0, 1.01), (0.0, 2.01)]
+    """
+    cells = {}
+    for state, (value0, value1) in enumerate(zip(store.values0, store.values1)):
+        cell = (grid_cell(value0, epsilon), grid_cell(value1, epsilon))
+        if cell not in cells or value0 + value1 > sum(store.values(cells[cell])):
+            cells[cell] = state
+
+    if len(cells) < len(store):
+        store.keep(sorted(cells.values()))
+
+
+def grid_cell(value: float, epsilon: float):
+    if value == -math.inf:
+        return None
+    return math.floor(value / epsilon)
+
+
+def log_value(value: float) -> float:
+    return math.log(value) if value > 0 else -math.inf
+
+
+def log_add(log_a: float, log_b: float) -> float:
+    """
+    Calculate log(a + b) from log(a) and log(b) without leaving log space.
+
+    Examples:
+        >>> round(math.exp(log_add(math.log(2.0), math.log(3.0))), 9)
+        5.0
+        >>> log_add(-math.inf, 0.0)
+        0.0
+    """
+    if log_a < log_b:
+        log_a, log_b = log_b, log_a
+    if log_b == -math.inf:
+        return log_a
+    return log_a + math.log1p(math.exp(log_b - log_a))
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
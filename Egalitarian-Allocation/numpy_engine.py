@@ -0,0 +1,131 @@
+from typing import List, Tuple
+
+import numpy as np
+
+
+class NumpyStateStore:
+    """
+    Layered store of two-player situations that keeps a whole layer in NumPy arrays.
+
+    It has the same interface as StateStore, but every layer is produced in one vectorized step.
+    Situations keep the order of the pure-Python store, so both engines choose the same allocation.
+
+    Examples:
+        >>> store = NumpyStateStore()
+        >>> store.expand(1.0, 6.0)
+        >>> store.expand(4.0, 4.0)
+        >>> len(store)
+        4
+        >>> store.values(2)
+        (4.0, 6.0)
+        >>> store.assignment(2)
+        ([1], [0])
+    """
+
+    def __init__(self, value0: float = 0.0, value1: float = 0.0):
+        self.values0 = np.array([value0], dtype=np.float64)
+        self.values1 = np.array([value1], dtype=np.float64)
+        self.parents: List[np.ndarray] = []
+        self.choices: List[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return len(self.values0)
+
+    def values(self, state: int) -> Tuple[float, float]:
+        return float(self.values0[state]), float(self.values1[state])
+
+    def expand(self, value0: float, value1: float, combine=np.add):
+        """
+        Give the next item to each player in turn, for every situation of the current layer.
+
+        Args:
+            value0 (float): Value of the item for Player 0.
+            value1 (float): Value of the item for Player 1.
+            combine (np.ufunc): How an item value is added to a player value (sum by default).
+        """
+        size = len(self.values0)
+
+        # Situation 2j gives the item to Player 0 and situation 2j + 1 gives it to Player 1
+        self.values0 = np.column_stack((combine(self.values0, value0), self.values0)).ravel()
+        self.values1 = np.column_stack((self.values1, combine(self.values1, value1))).ravel()
+        self.parents.append(np.repeat(np.arange(size, dtype=np.int64), 2))
+        self.choices.append(np.tile(np.array([0, 1], dtype=np.uint8), size))
+
+    def best_state(self) -> int:
+        """
+        Find the first situation of the current layer with the largest value of the poorer player.
+        """
+        return int(np.argmax(np.minimum(self.values0, self.values1)))
+
+    def keep(self, states: np.ndarray):
+        """
+        Keep only the given situations of the current layer.
+
+        Args:
+            states (np.ndarray): Boolean mask or indices of the situations to keep.
+        """
+        self.values0 = self.values0[states]
+        self.values1 = self.values1[states]
+        if self.parents:
+            self.parents[-1] = self.parents[-1][states]
+            self.choices[-1] = self.choices[-1][states]
+
+    def assignment(self, state: int) -> Tuple[List[int], List[int]]:
+        """
+        Rebuild the items of each player for a situation of the current layer.
+
+        Args:
+            state (int): Index of the situation in the current layer.
+
+        Returns:
+            Tuple[List[int], List[int]]: Items of Player 0 and items of Player 1.
+        """
+        items = ([], [])
+        for layer in range(len(self.parents) - 1, -1, -1):
+            items[self.choices[layer][state]].append(layer)
+            state = self.parents[layer][state]
+
+        items[0].reverse()
+        items[1].reverse()
+        return items
+
+
+def numpy_pruning1(store: NumpyStateStore):
+    """
+    Remove situations whose (value0, value1) pair already appeared earlier in the current layer.
+
+    Examples:
+        >>> store = NumpyStateStore()
+        >>> store.expand(1.0, 1.0)
+        >>> store.expand(1.0, 1.0)
+        >>> numpy_pruning1(store)
+        >>> [store.values(state) for state in range(len(store))]
+        [(2.0, 0.0), (1.0, 1.0), (0.0, 2.0)]
+    """
+    # A complex number holds the value pair exactly, and sorting it in 1D is much faster than np.unique(axis=0)
+    value_pairs = np.empty(len(store), dtype=np.complex128)
+    value_pairs.real = store.values0
+    value_pairs.imag = store.values1
+    _, first_states = np.unique(value_pairs, return_index=True)
+
+    if len(first_states) < len(store):
+        store.keep(np.sort(first_states))
+
+
+def numpy_pruning2(store: NumpyStateStore, suffix_values1: List[float], suffix_values2: List[float], index: int,
+                   pessimistic_value: float):
+    """
+    Remove the situations of the current layer that cannot beat the pessimistic value.
+
+    Examples:
+        >>> store = NumpyStateStore()
+        >>> store.expand(1.0, 6.0)
+        >>> numpy_pruning2(store, [8.0, 7.0, 3.0, 0], [16.0, 10.0, 6.0, 0], 1, 7.0)
+        >>> [store.values(state) for state in range(len(store))]
+        [(1.0, 0.0)]
+    """
+    optimistic_values = np.minimum(store.values0 + suffix_values1[index], store.values1 + suffix_values2[index])
+    promising = optimistic_values > pessimistic_value
+
+    if not promising.all():
+        store.keep(promising)
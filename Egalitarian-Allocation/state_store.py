@@ -0,0 +1,112 @@
+import operator
+from array import array
+from typing import Callable, Iterable, List, Tuple
+
+
+class StateStore:
+    """
+    Compact layered store of two-player situations.
+
+    Only the current layer keeps the player values, in two parallel arrays of floats.
+    Every layer that was expanded keeps a parent index and a choice bit per situation,
+    so the items of a situation are rebuilt by walking back through the layers instead
+    of copying item lists for every new situation.
+
+    Examples:
+        >>> store = StateStore()
+        >>> store.expand(1.0, 6.0)
+        >>> store.expand(4.0, 4.0)
+        >>> len(store)
+        4
+        >>> store.values(1)
+        (1.0, 4.0)
+        >>> store.assignment(2)
+        ([1], [0])
+        >>> store.keep([1, 2])
+        >>> store.values(0), store.assignment(0)
+        ((1.0, 4.0), ([0], [1]))
+    """
+
+    def __init__(self, value0: float = 0.0, value1: float = 0.0):
+        self.values0 = array('d', [value0])
+        self.values1 = array('d', [value1])
+        self.parents: List[array] = []
+        self.choices: List[bytearray] = []
+
+    def __len__(self) -> int:
+        return len(self.values0)
+
+    def values(self, state: int) -> Tuple[float, float]:
+        return self.values0[state], self.values1[state]
+
+    def best_state(self) -> int:
+        """
+        Find the first situation of the current layer with the largest value of the poorer player.
+        """
+        return max(range(len(self.values0)), key=lambda state: min(self.values0[state], self.values1[state]))
+
+    def expand(self, value0: float, value1: float, combine: Callable[[float, float], float] = operator.add):
+        """
+        Give the next item to each player in turn, for every situation of the current layer.
+
+        Args:
+            value0 (float): Value of the item for Player 0.
+            value1 (float): Value of the item for Player 1.
+            combine (Callable): How an item value is added to a player value (sum by default).
+        """
+        old_values0, old_values1 = self.values0, self.values1
+        size = len(old_values0)
+
+        new_values0 = array('d', bytes(16 * size))
+        new_values1 = array('d', bytes(16 * size))
+        parents = array('q', bytes(16 * size))
+        choices = bytearray(b'\x00\x01' * size)
+
+        for j in range(size):
+            v0 = old_values0[j]
+            v1 = old_values1[j]
+            new_values0[2 * j] = combine(v0, value0)
+            new_values1[2 * j] = v1
+            new_values0[2 * j + 1] = v0
+            new_values1[2 * j + 1] = combine(v1, value1)
+            parents[2 * j] = j
+            parents[2 * j + 1] = j
+
+        # The values of the previous layer are no longer needed and are released here
+        self.values0, self.values1 = new_values0, new_values1
+        self.parents.append(parents)
+        self.choices.append(choices)
+
+    def keep(self, states: Iterable[int]):
+        """
+        Keep only the given situations of the current layer, in the given order.
+
+        Args:
+            states (Iterable[int]): Indices of the situations to keep.
+        """
+        states = list(states)
+        self.values0 = array('d', [self.values0[s] for s in states])
+        self.values1 = array('d', [self.values1[s] for s in states])
+        if self.parents:
+            parents, choices = self.parents[-1], self.choices[-1]
+            self.parents[-1] = array('q', [parents[s] for s in states])
+            self.choices[-1] = bytearray(choices[s] for s in states)
+
+    def assignment(self, state: int) -> Tuple[List[int], List[int]]:
+        """
+        Rebuild the items of each player for a situation of the current layer.
+
+        Args:
+            state (int): Index of the situation in the current layer.
+
+        Returns:
+            Tuple[List[int], List[int]]: Items of Player 0 and items of Player 1.
+        """
+        items = ([], [])
+        for layer in range(len(self.parents) - 1, -1, -1):
+            items[self.choices[layer][state]].append(layer)
+            state = self.parents[layer][state]
+
+        items[0].reverse()
+        items[1].reverse()
+        return items
@@ -0,0 +1,227 @@
+import time
+from array import array
+from random import Random
+from typing import List, Optional, Tuple
+
+
+def find_decomposition(itemCost: list[float], preferences: list[set[int]], engine: str = "python") -> dict:
+    """
+    Split the cost of every item equally among the players who support it and still have budget.
+
+    Every player gets an equal share of the total cost as budget. The supporters of every item are
+    looked up in an index built once from the preferences, instead of scanning all the players per item.
+
+    Args:
+        itemCost (list[float]): The cost of every item.
+        preferences (list[set[int]]): The items every player supports.
+        engine (str): "python" for the array-based loop, or "numpy" to debit the shares of each item in bulk.
+
+    Returns:
+        dict: result[player][item] is the share of the item's cost paid by the player.
+
+    Examples:
+        >>> find_decomposition([100, 200, 150], [{0, 1}, {1, 2}, {0, 2}])
+        {0: {0: 50.0, 1: 100.0}, 1: {1: 100.0, 2: 75.0}, 2: {0: 50.0, 2: 75.0}}
+        >>> find_decomposition([400, 50, 50, 0], [{0, 1}, {0, 2}, {0, 3}, {1, 2}, {0}], engine="numpy")
+        {0: {0: 100.0}, 1: {0: 100.0}, 2: {0: 100.0}, 3: {1: 50.0, 2: 50.0}, 4: {0: 100.0}}
+    """
+    total_budget = sum(itemCost)
+    num_players = len(preferences)
+
+    # Initialize the result dictionary to store the budget allocation for each player
+    result = {i: {} for i in range(num_players)}
+    if num_players == 0:
+        return result
+
+    supporters = supporters_index(len(itemCost), preferences)
+
+    if engine == "numpy":
+        return numpy_decomposition(itemCost, supporters, total_budget // num_players, result)
+    if engine != "python":
+        raise ValueError(f"Unknown engine: {engine}")
+
+    budget_players = array('d', [total_budget // num_players]) * num_players
+
+    # Iterate through each item
+    for item, item_cost in enumerate(itemCost):
+        # The players who support the current item, excluding those with zero budgets
+        supporting_players = [player for player in supporters[item] if budget_players[player] > 0]
+        if not supporting_players:
+            continue
+
+        # Divide the cost of the item among supporting players and deduct it from their budget
+        share_per_player = item_cost / len(supporting_players)
+        for player in supporting_players:
+            result[player][item] = share_per_player
+            budget_players[player] -= share_per_player
+
+    return result
+
+
+def numpy_decomposition(itemCost: list[float], supporters: list[list[int]], player_budget: float,
+                        result: dict) -> dict:
+    """
+    The loop of find_decomposition where the budget is a NumPy vector, so the supporters of every item
+    are filtered and debited with one masked operation.
+    """
+    import numpy as np
+
+    budget_players = np.full(len(result), player_budget, dtype=np.float64)
+
+    for item, item_cost in enumerate(itemCost):
+        item_supporters = np.asarray(supporters[item], dtype=np.int64)
+        supporting_players = item_supporters[budget_players[item_supporters] > 0]
+        if len(supporting_players) == 0:
+            continue
+
+        share_per_player = item_cost / len(supporting_players)
+        budget_players[supporting_players] -= share_per_player
+        for player in supporting_players.tolist():
+            result[player][item] = share_per_player
+
+    return result
+
+
+def supporters_index(num_items: int, preferences: list[set[int]]) -> list[list[int]]:
+    """
+    Build the inverted index from every item to the players who support it, in increasing order.
+
+    Examples:
+        >>> supporters_index(3, [{0, 1}, {1, 2}, {0, 2}])
+        [[0, 2], [0, 1], [1, 2]]
+    """
+    supporters = [[] for _ in range(num_items)]
+    for player, preference in enumerate(preferences):
+        for item in preference:
+            if 0 <= item < num_items:
+                supporters[item].append(player)
+    return supporters
+
+
+def find_flow_decomposition(itemCost: list[float], preferences: list[set[int]]) \
+        -> Tuple[Optional[dict], Optional[List[int]]]:
+    """
+    Decide exactly whether the costs can be split among the supporters of every item without any player
+    paying more than its equal share of the total cost, and find such a split.
+
+    The question is a maximum flow: source -> every player with the budget share as capacity, player -> every
+    item it supports without a capacity, and item -> sink with the item cost as capacity. A decomposition exists
+    if and only if the maximum flow pays for all the items. Otherwise, the items on the sink side of the minimum
+    cut cost more than the whole budget of the players who support them, which proves that no decomposition exists.
+
+    The share of every player is total_budget / num_players exactly, while find_decomposition floors it with //.
+    The floor does not change the greedy split of find_decomposition, which only uses the budget to skip the
+    players that ran out of it, but here the shares must add up to the total cost: with floored shares,
+    every budget that is not divisible by the number of players would have no decomposition.
+
+    Args:
+        itemCost (list[float]): The cost of every item.
+        preferences (list[set[int]]): The items every player supports.
+
+    Returns:
+        Tuple[Optional[dict], Optional[List[int]]]: The decomposition (result[player][item] is the amount the player
+        pays for the item) and None, or None and a set of items whose cost is more than the budget of their supporters.
+
+    Examples:
+        >>> find_flow_decomposition([400, 50, 50, 0], [{0, 1}, {0, 2}, {0, 3}, {1, 2}, {0}])
+        ({0: {0: 100.0}, 1: {0: 100.0}, 2: {0: 100.0}, 3: {1: 50.0, 2: 50.0}, 4: {0: 100.0}}, None)
+        >>> find_flow_decomposition([100, 200, 150], [{0}, {0}, {1, 2}])
+        (None, [1, 2])
+
+        A total of 401 split between 2 players, where each pays 200.5 in both engines:
+
+        >>> result, _ = find_flow_decomposition([200, 201], [{0, 1}, {0, 1}])
+        >>> {player: sum(payments.values()) for player, payments in result.items()}
+        {0: 200.5, 1: 200.5}
+        >>> find_decomposition([200, 201], [{0, 1}, {0, 1}])
+        {0: {0: 100.0, 1: 100.5}, 1: {0: 100.0, 1: 100.5}}
+    """
+    import networkx as nx
+    from networkx.algorithms.flow import preflow_push
+
+    total_budget = sum(itemCost)
+    num_players = len(preferences)
+    num_items = len(itemCost)
+    player_budget = total_budget / num_players if num_players else 0
+
+    # Players are the nodes 0..num_players - 1 and items follow them
+    flow_graph = nx.DiGraph()
+    flow_graph.add_node('source')
+    flow_graph.add_node('sink')
+    for player, preference in enumerate(preferences):
+        flow_graph.add_edge('source', player, capacity=player_budget)
+        for item in preference:
+            if 0 <= item < num_items:
+                # No capacity means an infinite capacity
+                flow_graph.add_edge(player, num_players + item)
+    for item, item_cost in enumerate(itemCost):
+        flow_graph.add_edge(num_players + item, 'sink', capacity=item_cost)
+
+    residual = preflow_push(flow_graph, 'source', 'sink')
+
+    if residual.graph['flow_value'] < total_budget - 1e-9 * max(1.0, abs(total_budget)):
+        # The items that the source cannot reach in the residual graph are on the sink side of the minimum cut
+        reachable = {'source'}
+        stack = ['source']
+        while stack:
+            node = stack.pop()
+            for next_node, edge in residual[node].items():
+                if next_node not in reachable and edge['flow'] < edge['capacity']:
+                    reachable.add(next_node)
+                    stack.append(next_node)
+        infeasible_items = [item for item in range(num_items) if num_players + item not in reachable]
+        return None, infeasible_items
+
+    result = {player: {} for player in range(num_players)}
+    for player in range(num_players):
+        payments = sorted((node - num_players, edge['flow']) for node, edge in residual[player].items()
+                          if node != 'source' and edge['flow'] > 0)
+        for item, amount in payments:
+            result[player][item] = float(amount)
+
+    return result, None
+
+
+def benchmark_players(player_counts=(1000, 10000, 50000), num_items: int = 2000, items_per_player: int = 20,
+                      seed: int = 0):
+    """
+    Time both engines of find_decomposition on random instances with a growing number of players,
+    and check that they give the same result.
+    """
+    rng = Random(seed)
+    for num_players in player_counts:
+        item_costs = [rng.randint(1, 1000) for _ in range(num_items)]
+        preferences = [set(rng.sample(range(num_items), items_per_player)) for _ in range(num_players)]
+
+        results = {}
+        for engine in ("python", "numpy"):
+            start_time = time.perf_counter()
+            results[engine] = find_decomposition(item_costs, preferences, engine)
+            print(f"{num_players} players, {engine}: {time.perf_counter() - start_time:.2f} seconds")
+
+        print("Same result:", results["python"] == results["numpy"])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Examples of find_decomposition.")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Also time both engines on random instances with up to 50000 players")
+    options = parser.parse_args()
+
+    # Example usage:
+    itemCosts = [100, 200, 150]
+    preferences = [{0, 1}, {1, 2}, {0, 2}]
+
+    result = find_decomposition(itemCosts, preferences)
+    print(result)
+
+    itemCosts = [400, 50, 50, 0]
+    preferences = [{0, 1}, {0, 2}, {0, 3}, {1, 2}, {0}]
+
+    result = find_decomposition(itemCosts, preferences)
+    print(result)
+
+    if options.benchmark:
+        benchmark_players()
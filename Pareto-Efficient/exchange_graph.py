@@ -0,0 +1,142 @@
+import heapq
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+if __package__:
+    from .pareto_efficinet import exchange_graph_arrays, find_negative_cycle, log_valuation_matrix
+else:
+    from pareto_efficinet import exchange_graph_arrays, find_negative_cycle, log_valuation_matrix
+
+
+class ExchangeGraph:
+    """
+    An exchange graph that follows an allocation as it changes, instead of being rebuilt for every check.
+
+    The edge i -> j only depends on which items player i holds, so the weights and the items of the graph
+    only change when an amount crosses zero. The best edges of a row are kept in one heap of
+    (log ratio, item) per pair, built the first time an item leaves that row, and items that stopped
+    being held are dropped lazily when they reach the top. Giving an item to a player is a single
+    comparison with the current edges, and taking it away only repairs the edges that used it,
+    so an update costs O(n log m) instead of the O(n^2 m) of a full rebuild.
+
+    Parameters:
+        valuations (List[List[float]]): valuations[i][j] is the value of item j for player i.
+        allocations (List[List[float]]): allocations[i][j] is the amount of item j allocated to player i.
+
+    Examples:
+        >>> graph = ExchangeGraph([[3, 1, 6], [6, 3, 1], [1, 6, 3]], [[1, 0, 0], [0, 1, 0], [0, 0, 1]])
+        >>> graph.is_pareto_efficient()
+        False
+        >>> graph.negative_cycle()
+        [(1, 2, 1), (2, 0, 2), (0, 1, 0)]
+        >>> for player, item, amount in [(0, 0, 0), (0, 2, 1), (1, 1, 0), (1, 0, 1), (2, 2, 0), (2, 1, 1)]:
+        ...     graph.set_allocation(player, item, amount)
+        >>> graph.is_pareto_efficient()
+        True
+        >>> graph.items.tolist()
+        [[-1, 2, 2], [0, -1, 0], [1, 1, -1]]
+    """
+
+    def __init__(self, valuations: List[List[float]], allocations: List[List[float]]):
+        self.allocations = np.array(allocations, dtype=np.float64)
+        self.log_valuations = log_valuation_matrix(valuations)
+        self.weights, self.items = exchange_graph_arrays(valuations, self.allocations)
+
+        num_players = len(self.weights)
+        self._heaps: List[Optional[List[list]]] = [None] * num_players
+        self._pushes = [0] * num_players
+
+    def set_allocation(self, player: int, item: int, amount: float):
+        """
+        Change the amount of an item allocated to a player, and update the graph if the player
+        starts or stops holding the item.
+        """
+        was_held = self.allocations[player, item] > 0
+        self.allocations[player, item] = amount
+
+        if amount > 0 and not was_held:
+            self._add_item(player, item)
+        elif amount <= 0 and was_held:
+            self._remove_item(player, item)
+
+    def negative_cycle(self) -> Optional[List[Tuple[int, int, int]]]:
+        """
+        A negative cycle of the graph as (player i, player j, item that i gives to j) arcs, or None.
+        """
+        return find_negative_cycle(self.weights, self.items)
+
+    def is_pareto_efficient(self) -> bool:
+        """
+        Check if the current allocation is Pareto efficient, like is_pareto_efficient on the current matrices.
+        """
+        return self.negative_cycle() is None
+
+    def _log_ratios(self, player: int, item: int) -> np.ndarray:
+        with np.errstate(invalid='ignore'):
+            log_ratios = self.log_valuations[player, item] - self.log_valuations[:, item]
+        log_ratios[np.isnan(log_ratios)] = np.inf
+        return log_ratios
+
+    def _add_item(self, player: int, item: int):
+        log_ratios = self._log_ratios(player, item)
+        weights, items = self.weights[player], self.items[player]
+
+        # Ties go to the lower item, like the argmin of the full rebuild
+        better = (items < 0) | (log_ratios < weights) | ((log_ratios == weights) & (item < items))
+        better[player] = False
+        weights[better] = log_ratios[better]
+        items[better] = item
+
+        heaps = self._heaps[player]
+        if heaps is not None:
+            for other, log_ratio in enumerate(log_ratios.tolist()):
+                if other != player:
+                    heapq.heappush(heaps[other], (log_ratio, item))
+
+            # Items that come and go leave stale entries behind, so the heaps are rebuilt once they grow too much
+            self._pushes[player] += 1
+            if self._pushes[player] > self.allocations.shape[1]:
+                self._heaps[player] = None
+
+    def _remove_item(self, player: int, item: int):
+        affected = np.flatnonzero(self.items[player] == item)
+        if len(affected) == 0:
+            return
+
+        heaps = self._heaps[player]
+        if heaps is None:
+            heaps = self._build_heaps(player)
+
+        held = self.allocations[player]
+        for other in affected.tolist():
+            heap = heaps[other]
+            while heap and not held[heap[0][1]] > 0:
+                heapq.heappop(heap)
+
+            if heap:
+                self.weights[player, other], self.items[player, other] = heap[0]
+            else:
+                self.weights[player, other], self.items[player, other] = np.inf, -1
+
+    def _build_heaps(self, player: int) -> List[list]:
+        held_items = np.flatnonzero(self.allocations[player] > 0)
+        with np.errstate(invalid='ignore'):
+            log_ratios = self.log_valuations[player, held_items][np.newaxis, :] - self.log_valuations[:, held_items]
+        log_ratios[np.isnan(log_ratios)] = np.inf
+
+        held_list = held_items.tolist()
+        heaps = []
+        for other, row in enumerate(log_ratios.tolist()):
+            heap = list(zip(row, held_list)) if other != player else []
+            heapq.heapify(heap)
+            heaps.append(heap)
+
+        self._heaps[player] = heaps
+        self._pushes[player] = 0
+        return heaps
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
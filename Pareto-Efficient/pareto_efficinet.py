@@ -1,45 +1,166 @@
-import networkx as nx
-import math
-from typing import List
+import time
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+if __package__:
+    from .sparse_allocation import SparseAllocation, as_sparse_allocation
+else:
+    from sparse_allocation import SparseAllocation, as_sparse_allocation
 
 #Part A
-def create_exchange_graph(valuations: List[List[float]], allocations: List[List[float]]) -> nx.DiGraph:
+def exchange_graph_arrays(valuations: List[List[float]], allocations: List[List[float]]) -> Tuple[np.ndarray, np.ndarray]:
     """
-    Build a directed graph representing the allocation scenario.
+    Build the exchange graph as two n x n matrices, with NumPy instead of a loop over every pair of players and item.
+
+    The weight of the edge i -> j is the smallest log(valuations[i][z] / valuations[j][z]) over the items z
+    that player i holds, and its item is the z that reaches it. The log-valuation matrix is computed once,
+    and each row of the graph is one broadcast over the items held by player i.
 
     Args:
     - valuations (List[List[float]]): The valuation matrix where valuations[i][j] represents the value of item j for player i.
     - allocations (List[List[float]]): The allocation matrix where allocations[i][j] represents the amount of item j allocated to player i.
+      It may also be sparse (a SparseAllocation, or a sparse matrix of SciPy), see sparse_exchange_graph_arrays.
+
+    Returns:
+    - Tuple[np.ndarray, np.ndarray]: The weight matrix and the item matrix. An edge without any held item,
+      and the diagonal, have an infinite weight and the item -1.
+
+    Examples:
+    >>> weights, items = exchange_graph_arrays([[10, 20, 30, 40], [40, 30, 20, 10]], [[0, 0.7, 1, 1], [1, 0.3, 0, 0]])
+    >>> weights.round(3).tolist()
+    [[inf, -0.405], [0.405, inf]]
+    >>> items.tolist()
+    [[-1, 1], [1, -1]]
+    """
+    sparse_allocations = as_sparse_allocation(allocations)
+    if sparse_allocations is not None:
+        return sparse_exchange_graph_arrays(valuations, sparse_allocations)
+
+    allocations = np.asarray(allocations, dtype=np.float64)
+    log_valuations = log_valuation_matrix(valuations)
+    num_players = log_valuations.shape[0]
+
+    weights = np.full((num_players, num_players), np.inf)
+    items = np.full((num_players, num_players), -1, dtype=np.int64)
+    update_exchange_rows(weights, items, log_valuations, allocations, range(num_players))
+
+    return weights, items
+
+
+def sparse_exchange_graph_arrays(valuations: List[List[float]], allocations: SparseAllocation) \
+        -> Tuple[np.ndarray, np.ndarray]:
+    """
+    exchange_graph_arrays for a sparse allocation. The row of player i is computed from the log-valuations
+    of the items player i holds only, gathered from the valuations one row at a time, so the valuation matrix
+    is never copied as a whole, and apart from the n x n graph the memory is proportional to the holdings
+    of one player. The ties between items are broken like the dense path, so both give the same matrices.
+
+    Examples:
+    >>> allocations = SparseAllocation(2, 4, [(0, 1, 0.7), (0, 2, 1), (0, 3, 1), (1, 0, 1), (1, 1, 0.3)])
+    >>> weights, items = sparse_exchange_graph_arrays([[10, 20, 30, 40], [40, 30, 20, 10]], allocations)
+    >>> weights.round(3).tolist()
+    [[inf, -0.405], [0.405, inf]]
+    >>> items.tolist()
+    [[-1, 1], [1, -1]]
+    """
+    num_players = allocations.shape[0]
+
+    weights = np.full((num_players, num_players), np.inf)
+    items = np.full((num_players, num_players), -1, dtype=np.int64)
+    for i in range(num_players):
+        held_items = allocations.held_items(i)
+        if isinstance(valuations, np.ndarray):
+            held_valuations = valuations[:, held_items]
+        else:
+            held_list = held_items.tolist()
+            held_valuations = [[row[item] for item in held_list] for row in valuations]
+        set_exchange_row(weights, items, i, log_valuation_matrix(held_valuations).reshape(num_players, -1), held_items)
+
+    return weights, items
+
+
+def log_valuation_matrix(valuations: List[List[float]]) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.log(np.asarray(valuations, dtype=np.float64))
+
+
+def update_exchange_rows(weights: np.ndarray, items: np.ndarray, log_valuations: np.ndarray, allocations: np.ndarray,
+                         players) -> None:
+    """
+    Recompute, in place, the outgoing edges of the given players in the exchange graph matrices.
+    The edges i -> j only depend on the items player i holds, so a change in the allocation of
+    player i only changes row i.
+    """
+    for i in players:
+        held_items = np.flatnonzero(allocations[i] > 0)
+        set_exchange_row(weights, items, i, log_valuations[:, held_items], held_items)
+
+
+def set_exchange_row(weights: np.ndarray, items: np.ndarray, player: int, held_log_valuations: np.ndarray,
+                     held_items: np.ndarray) -> None:
+    """
+    Set the outgoing edges of a player in place, where held_log_valuations[:, k] are the log-valuations
+    of every player for held_items[k], the items the player holds in increasing order.
+    """
+    weights[player] = np.inf
+    items[player] = -1
+
+    if len(held_items) > 0:
+        with np.errstate(invalid='ignore'):
+            log_ratios = held_log_valuations[player][np.newaxis, :] - held_log_valuations
+        log_ratios[np.isnan(log_ratios)] = np.inf
+
+        best = log_ratios.argmin(axis=1)
+        weights[player] = log_ratios[np.arange(len(weights)), best]
+        items[player] = held_items[best]
+
+    weights[player, player] = np.inf
+    items[player, player] = -1
+
+
+def create_exchange_graph(valuations: List[List[float]], allocations: List[List[float]], as_arrays: bool = False):
+    """
+    Build a directed graph representing the allocation scenario.
+
+    Args:
+    - valuations (List[List[float]]): The valuation matrix where valuations[i][j] represents the value of item j for player i.
+    - allocations (List[List[float]]): The allocation matrix where allocations[i][j] represents the amount of item j allocated to player i,
+      or a sparse allocation like in exchange_graph_arrays.
+    - as_arrays (bool): Return the weight and item matrices of exchange_graph_arrays instead of a NetworkX graph.
 
     Returns:
     - nx.DiGraph: Directed graph representing the allocation scenario.
+
+    Examples:
+    >>> graph = create_exchange_graph([[10, 20, 30, 40], [40, 30, 20, 10]], [[0, 0.7, 1, 1], [1, 0.3, 0, 0]])
+    >>> graph.edges['Player_0', 'Player_1']['item'], round(graph.edges['Player_0', 'Player_1']['weight'], 3)
+    (1, -0.405)
     """
-    num_players = len(valuations)
+    weights, items = exchange_graph_arrays(valuations, allocations)
+    if as_arrays:
+        return weights, items
+
+    import networkx as nx
+
+    num_players = len(weights)
     nx_graph = nx.DiGraph()
+    weight_rows, item_rows = weights.tolist(), items.tolist()
 
-    for i in range(num_players):
-        for j in range(num_players):
-            if i != j:
-                min_weight = float('inf')
-                index = -1
-                for z in range(len(valuations[i])):
-                    if allocations[i][z] > 0:
-                        new_ratio = math.log(valuations[i][z] / valuations[j][z])
-                        if new_ratio < min_weight:
-                            min_weight = new_ratio
-                            index = z
-
-                nx_graph.add_edge(f"Player_{i}", f"Player_{j}", weight=min_weight, item=index)
+    nx_graph.add_edges_from((f"Player_{i}", f"Player_{j}", {'weight': weight_rows[i][j], 'item': item_rows[i][j]})
+                            for i in range(num_players) for j in range(num_players) if i != j)
 
     return nx_graph
 #
-def is_pareto_efficient(valuations: List[List[float]], allocations: List[List[float]]) -> bool:
+def is_pareto_efficient(valuations: List[List[float]], allocations: List[List[float]], tracer=None) -> bool:
     """
        Check if a given allocation is Pareto efficient.
 
        Args:
        - valuations (List[List[float]]): The valuation matrix where valuations[i][j] represents the value of item j for player i.
        - allocations (List[List[float]]): The allocation matrix where allocations[i][j] represents the amount of item j allocated to player i.
+         It may also be a SparseAllocation or a sparse matrix of SciPy, for markets where every player holds few items.
+       - tracer: Optional tracer (see economic_algo.tracing) that counts the checks and the Bellman-Ford rounds.
 
        Returns:
        - bool: True if the allocation is Pareto efficient, False otherwise.
@@ -54,68 +175,260 @@ def is_pareto_efficient(valuations: List[List[float]], allocations: List[List[fl
        >>> allocations2 = [[1, 0, 0], [0, 1, 0], [0, 0, 1]]
        >>> is_pareto_efficient(valuations2, allocations2)
        False
+       >>> is_pareto_efficient(valuations2, SparseAllocation(3, 3, [(0, 0, 1), (1, 1, 1), (2, 2, 1)]))
+       False
        """
-    nx_graph = create_exchange_graph(valuations, allocations)
+    if tracer is not None:
+        tracer.lap(None)
 
-    # Check for negative weight cycles using NetworkX's Bellman-Ford
-    negative_cycle = nx.negative_edge_cycle(nx_graph, weight='weight')
+    weights, items = exchange_graph_arrays(valuations, allocations)
+    if tracer is not None:
+        tracer.lap("exchange_graph")
+        tracer.count("pareto_checks")
 
-    return not negative_cycle  # If no negative weight cycle, return True
+    # Check for negative weight cycles with a Bellman-Ford over the weight matrix
+    negative_cycle = find_negative_cycle(weights, items, tracer=tracer)
+    if tracer is not None:
+        tracer.lap("find_cycle")
 
-#Part B
+    return negative_cycle is None  # If no negative weight cycle, return True
+
+
+def find_negative_cycle(weights: np.ndarray, items: np.ndarray, tolerance: float = 1e-12,
+                        tracer=None) -> Optional[List[Tuple[int, int, int]]]:
+    """
+    Find a negative cycle in the exchange graph, with a Bellman-Ford that relaxes the whole matrix at once.
+
+    Every player starts at distance 0 (like a virtual source connected to all players). Each round relaxes
+    all n x n edges with one min over the columns, and the search stops as soon as a round changes nothing,
+    or as soon as the predecessors close a negative cycle.
+
+    Args:
+    - weights (np.ndarray): The n x n weight matrix of the exchange graph.
+    - items (np.ndarray): The n x n item matrix of the exchange graph.
+    - tolerance (float): Improvements smaller than this are treated as rounding errors, so cycles of weight 0
+      (like trading an item back and forth) are not reported.
+    - tracer: Optional tracer (see economic_algo.tracing) that counts the Bellman-Ford rounds.
+
+    Returns:
+    - Optional[List[Tuple[int, int, int]]]: The arcs (player i, player j, item that i gives to j) of a negative cycle,
+      or None if there is no negative cycle.
+
+    Examples:
+    >>> weights, items = exchange_graph_arrays([[3, 1, 6], [6, 3, 1], [1, 6, 3]], [[1, 0, 0], [0, 1, 0], [0, 0, 1]])
+    >>> find_negative_cycle(weights, items)
+    [(1, 2, 1), (2, 0, 2), (0, 1, 0)]
+    >>> weights, items = exchange_graph_arrays([[10, 20, 30, 40], [40, 30, 20, 10]], [[0, 0.7, 1, 1], [1, 0.3, 0, 0]])
+    >>> find_negative_cycle(weights, items) is None
+    True
+    """
+    num_players = len(weights)
+    distances = np.zeros(num_players)
+    predecessors = np.full(num_players, -1, dtype=np.int64)
+    columns = np.arange(num_players)
 
+    for _ in range(num_players):
+        if tracer is not None:
+            tracer.count("bellman_ford_rounds")
 
-    def find_positive_allocation_resources(player_allocation: List[float], epsilon: float) -> List[int]:
-        return [resource_idx for resource_idx, allocation in enumerate(player_allocation) if allocation >= epsilon]
+        with np.errstate(invalid='ignore'):
+            candidates = distances[:, np.newaxis] + weights
+        candidates[np.isnan(candidates)] = np.inf
 
-    def transfer_resources(improved_allocation: List[List[float]], player: int, resource: int, transfer_amount: float,
-                           next_player: int) -> None:
-        improved_allocation[player][resource] -= transfer_amount
-        improved_allocation[next_player][resource] += transfer_amount
+        best = candidates.argmin(axis=0)
+        best_distances = candidates[best, columns]
+        updated = best_distances < distances - tolerance
+        if not updated.any():
+            return None
 
-    def improve_pareto(valuations: List[List[float]], current_allocation: List[List[float]]) -> List[List[float]]:
-        """
-           Improve a given allocation to achieve Pareto efficiency.
+        distances[updated] = best_distances[updated]
+        predecessors[updated] = best[updated]
 
-           Args:
-           - valuations (list[list[float]]): List of valuations for each player.
-           - allocation (list[list[float]]): Current allocation matrix.
+        # Stop early as soon as the predecessors close a negative cycle
+        for cycle in predecessor_cycles(predecessors, cycle_players(predecessors)):
+            if sum(weights[i, j] for i, j in cycle) < -tolerance:
+                return [(i, j, int(items[i, j])) for i, j in cycle]
 
-           Returns:
-           - list[list[float]]: Improved Pareto efficient allocation.
+    return None
 
-           Examples:
-           >>> improve_pareto([[10, 20, 30, 40], [40, 30, 20, 10]], [[0.1, 1, 0.5, 1], [0.9, 0, 0.5, 0]])
-           [[0, 0.7, 1, 1], [1, 0.3, 0, 0]]
 
-           >>> improve_pareto([[3, 6, 1], [6, 1, 3], [1, 3, 6]], [[0, 1, 0], [1, 0, 0], [0, 0, 1]])
-           [[0, 1, 0], [1, 0, 0], [0, 0, 1]]
+def cycle_players(predecessors: np.ndarray) -> np.ndarray:
+    """
+    Find the players that reach a cycle when following their predecessors, by repeated squaring
+    of the predecessor map (players without a predecessor point to an extra root that points to itself).
 
-           >>> improve_pareto([[1, 3, 6], [3, 6, 1], [6, 1, 3]], [[0, 1, 0], [1, 0, 0], [0, 0, 1]])
-           [[0, 0.0, 1.0], [0.0, 1.0, 0], [1.0, 0, 0.0]]
+    Examples:
+    >>> cycle_players(np.array([-1, 2, 1, 2])).tolist()
+    [1, 2, 3]
+    """
+    num_players = len(predecessors)
+    jumps = np.append(np.where(predecessors < 0, num_players, predecessors), num_players)
 
-           """
+    steps = 1
+    while steps <= num_players:
+        jumps = jumps[jumps]
+        steps *= 2
 
-        num_players = len(valuations)
+    return np.flatnonzero(jumps[:num_players] != num_players)
 
-        improved_allocation = [row.copy() for row in current_allocation]
-        epsilon = 0.1
 
+def predecessor_cycles(predecessors: np.ndarray, starts: np.ndarray) -> Iterator[List[Tuple[int, int]]]:
+    """
+    Follow the predecessors from every start and yield the arcs of each cycle they reach, in forward order.
 
-        while not is_pareto_efficient(valuations, improved_allocation):
+    Every walk marks the players it visits, so a walk stops as soon as it reaches a player that an earlier
+    walk has visited, and each cycle is extracted only once.
 
-            for i in range(num_players):
-                positive_resources = find_positive_allocation_resources(improved_allocation[i], epsilon)
+    Examples:
+    >>> list(predecessor_cycles(np.array([-1, 2, 1, 2]), np.array([1, 2, 3])))
+    [[(2, 1), (1, 2)]]
+    """
+    visited_by = np.full(len(predecessors), -1, dtype=np.int64)
+
+    for walk, start in enumerate(starts):
+        node = int(start)
+        while node >= 0 and visited_by[node] < 0:
+            visited_by[node] = walk
+            node = int(predecessors[node])
+        if node < 0 or visited_by[node] != walk:
+            continue
+
+        # The walk came back to one of its own players, which is on a new cycle
+        cycle_nodes = [node]
+        previous = int(predecessors[node])
+        while previous != node:
+            cycle_nodes.append(previous)
+            previous = int(predecessors[previous])
+
+        cycle_nodes.reverse()
+        yield [(cycle_nodes[k], cycle_nodes[(k + 1) % len(cycle_nodes)]) for k in range(len(cycle_nodes))]
 
-                if positive_resources:
-                    min_valuation_resource = min(positive_resources,
-                                                 key=lambda resource_idx: valuations[i][resource_idx])
-                    transfer_amount = min(epsilon, improved_allocation[i][min_valuation_resource])
+#Part B
+def improve_pareto(valuations: List[List[float]], current_allocation: List[List[float]],
+                   stats: Optional[dict] = None, max_iterations: Optional[int] = None,
+                   tracer=None) -> List[List[float]]:
+    """
+    Improve a given allocation to achieve Pareto efficiency.
 
-                    transfer_resources(improved_allocation, i, min_valuation_resource, transfer_amount,
-                                       (i + 1) % num_players)
+    While the exchange graph has a negative cycle, every player on the cycle gives the item of its arc to the
+    next player. Every player gets at least the value it gives, and the amounts are as large as possible,
+    so at least one player gives away all it holds of its item. After each trade, only the rows of the
+    exchange graph of the players on the cycle are recomputed.
+
+    Args:
+    - valuations (list[list[float]]): List of valuations for each player.
+    - current_allocation (list[list[float]]): Current allocation matrix.
+    - stats (Optional[dict]): If given, filled with the number of 'iterations' (trades) and the 'seconds' it took.
+    - max_iterations (Optional[int]): Maximal number of trades, no limit by default.
+    - tracer: Optional tracer (see economic_algo.tracing) that counts the Pareto checks, the Bellman-Ford rounds
+      and the trades, and times every phase.
 
-            return improved_allocation
+    Returns:
+    - list[list[float]]: Improved Pareto efficient allocation.
+
+    Examples:
+    >>> improved = improve_pareto([[10, 20, 30, 40], [40, 30, 20, 10]], [[0.1, 1, 0.5, 1], [0.9, 0, 0.5, 0]])
+    >>> [[round(amount, 3) for amount in row] for row in improved]
+    [[0.0, 0.55, 1.0, 1.0], [1.0, 0.45, 0.0, 0.0]]
+
+    >>> improve_pareto([[3, 6, 1], [6, 1, 3], [1, 3, 6]], [[0, 1, 0], [1, 0, 0], [0, 0, 1]])
+    [[0.0, 1.0, 0.0], [1.0, 0.0, 0.0], [0.0, 0.0, 1.0]]
+
+    >>> stats = {}
+    >>> improve_pareto([[1, 3, 6], [3, 6, 1], [6, 1, 3]], [[0, 1, 0], [1, 0, 0], [0, 0, 1]], stats)
+    [[0.0, 0.0, 1.0], [0.0, 1.0, 0.0], [1.0, 0.0, 0.0]]
+    >>> stats['iterations']
+    1
+
+    >>> improve_pareto([[0, 1], [1, 0]], [[1, 0], [0, 1]])
+    [[0.0, 1.0], [1.0, 0.0]]
+    """
+    start_time = time.perf_counter()
+    if tracer is not None:
+        tracer.lap(None)
+
+    sparse_allocation = as_sparse_allocation(current_allocation)
+    if sparse_allocation is not None:
+        current_allocation = sparse_allocation.to_dense()
+    improved_allocation = np.array(current_allocation, dtype=np.float64)
+    log_valuations = log_valuation_matrix(valuations)
+    weights, items = exchange_graph_arrays(valuations, improved_allocation)
+    if tracer is not None:
+        tracer.lap("exchange_graph")
+
+    iterations = 0
+    while max_iterations is None or iterations < max_iterations:
+        if tracer is not None:
+            tracer.count("pareto_checks")
+        cycle = find_negative_cycle(weights, items, tracer=tracer)
+        if tracer is not None:
+            tracer.lap("find_cycle")
+        if cycle is None:
+            break
+
+        trade_along_cycle(valuations, improved_allocation, cycle)
+        iterations += 1
+        if tracer is not None:
+            tracer.lap("trade")
+            tracer.count("trades")
+
+        update_exchange_rows(weights, items, log_valuations, improved_allocation, {i for i, _, _ in cycle})
+        if tracer is not None:
+            tracer.lap("update_rows")
+
+    if stats is not None:
+        stats['iterations'] = iterations
+        stats['seconds'] = time.perf_counter() - start_time
+
+    return improved_allocation.tolist()
+
+
+def trade_along_cycle(valuations: List[List[float]], allocation: np.ndarray, cycle: List[Tuple[int, int, int]],
+                      epsilon: float = 1e-12) -> None:
+    """
+    Perform, in place, the largest trade along a negative cycle of the exchange graph.
+
+    Player i of arc k gives amounts[k] of its item to the next player, and must receive at least the value
+    it gives: amounts[k] <= amounts[k - 1] * ratios[k]. Since the cycle is negative, the product of the ratios
+    is above 1, so the trade is a Pareto improvement. Every amount starts at all the player holds of its item,
+    and is lowered around the cycle until every player gets at least the value it gives.
+    A player that gives an item it values at 0 gives it for free: its ratio is infinite, and its amount
+    is only capped by what it holds.
+
+    Examples:
+    >>> allocation = np.array([[1.0, 0, 0], [0, 1.0, 0], [0, 0, 1.0]])
+    >>> trade_along_cycle([[3, 1, 6], [6, 3, 1], [1, 6, 3]], allocation, [(0, 1, 0), (1, 2, 1), (2, 0, 2)])
+    >>> allocation.tolist()
+    [[0.0, 0.0, 1.0], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0]]
+    >>> allocation = np.array([[1.0, 0], [0, 1.0]])
+    >>> trade_along_cycle([[0, 1], [1, 0]], allocation, [(0, 1, 0), (1, 0, 1)])
+    >>> allocation.tolist()
+    [[0.0, 1.0], [1.0, 0.0]]
+    """
+    length = len(cycle)
+    amounts = [allocation[player, item] for player, _, item in cycle]
+    ratios = [valuations[player][cycle[k - 1][2]] / valuations[player][item] if valuations[player][item] else np.inf
+              for k, (player, _, item) in enumerate(cycle)]
+
+    changed = True
+    passes = 0
+    while changed and passes <= 2 * length:
+        changed = False
+        for k in range(length):
+            if ratios[k] == np.inf:
+                continue
+            bound = amounts[k - 1] * ratios[k]
+            if amounts[k] > bound:
+                amounts[k] = bound
+                changed = True
+        passes += 1
+
+    for (player, next_player, item), amount in zip(cycle, amounts):
+        transfer = min(amount, allocation[player, item])
+        allocation[player, item] -= transfer
+        allocation[next_player, item] += transfer
+        if allocation[player, item] < epsilon:
+            allocation[player, item] = 0.0
 
 
 if __name__ == "__main__":
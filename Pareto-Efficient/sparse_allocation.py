@@ -0,0 +1,108 @@
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+class SparseAllocation:
+    """
+    Allocation matrix stored in compressed sparse row (CSR) arrays, for markets where every player
+    holds only a few of the items.
+
+    The holdings of player i are items[offsets[i]:offsets[i + 1]], sorted by item, with the matching
+    amounts in amounts. Only positive amounts are stored, and like a COO matrix, a repeated
+    (player, item) pair adds up its amounts. The memory is proportional to the number of holdings.
+
+    Parameters:
+        num_players (int): Number of rows of the allocation.
+        num_items (int): Number of columns of the allocation.
+        holdings (Iterable[Tuple[int, int, float]]): COO entries (player, item, amount).
+
+    Examples:
+        >>> allocation = SparseAllocation(2, 4, [(0, 1, 0.7), (0, 2, 1), (0, 3, 1), (1, 0, 1), (1, 1, 0.3)])
+        >>> allocation.offsets.tolist(), allocation.items.tolist()
+        ([0, 3, 5], [1, 2, 3, 0, 1])
+        >>> allocation.held_items(1).tolist()
+        [0, 1]
+        >>> allocation.to_dense()
+        [[0.0, 0.7, 1.0, 1.0], [1.0, 0.3, 0.0, 0.0]]
+        >>> SparseAllocation.from_dense([[0, 0.7, 1, 1], [1, 0.3, 0, 0]]).to_dense() == allocation.to_dense()
+        True
+    """
+
+    def __init__(self, num_players: int, num_items: int, holdings: Iterable[Tuple[int, int, float]]):
+        self.shape = (num_players, num_items)
+
+        entries = list(holdings)
+        players = np.array([player for player, _, _ in entries], dtype=np.int64)
+        items = np.array([item for _, item, _ in entries], dtype=np.int64)
+        amounts = np.array([amount for _, _, amount in entries], dtype=np.float64)
+        self._set_entries(players, items, amounts)
+
+    @classmethod
+    def from_dense(cls, allocations: List[List[float]]) -> "SparseAllocation":
+        """
+        Build the sparse form of a dense allocation matrix.
+        """
+        dense = np.asarray(allocations, dtype=np.float64)
+        players, items = np.nonzero(dense)
+        allocation = cls(*dense.shape, [])
+        allocation._set_entries(players, items, dense[players, items])
+        return allocation
+
+    @classmethod
+    def from_matrix(cls, matrix) -> "SparseAllocation":
+        """
+        Build the sparse form of any matrix with a tocoo method, like the sparse matrices of SciPy.
+        """
+        coo = matrix.tocoo()
+        allocation = cls(*coo.shape, [])
+        allocation._set_entries(np.asarray(coo.row, dtype=np.int64), np.asarray(coo.col, dtype=np.int64),
+                                np.asarray(coo.data, dtype=np.float64))
+        return allocation
+
+    def _set_entries(self, players: np.ndarray, items: np.ndarray, amounts: np.ndarray):
+        num_players, num_items = self.shape
+
+        # Sort the entries by (player, item) and add up repeated pairs
+        keys = players * num_items + items
+        unique_keys, positions = np.unique(keys, return_inverse=True)
+        summed = np.zeros(len(unique_keys))
+        np.add.at(summed, positions, amounts)
+
+        held = summed > 0
+        unique_keys, summed = unique_keys[held], summed[held]
+        rows = unique_keys // num_items if num_items else unique_keys
+
+        self.items = unique_keys - rows * num_items
+        self.amounts = summed
+        self.offsets = np.zeros(num_players + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=num_players), out=self.offsets[1:])
+
+    def held_items(self, player: int) -> np.ndarray:
+        """
+        The sorted items that a player holds a positive amount of.
+        """
+        return self.items[self.offsets[player]:self.offsets[player + 1]]
+
+    def to_dense(self) -> List[List[float]]:
+        dense = np.zeros(self.shape)
+        rows = np.repeat(np.arange(self.shape[0]), np.diff(self.offsets))
+        dense[rows, self.items] = self.amounts
+        return dense.tolist()
+
+
+def as_sparse_allocation(allocations) -> Optional[SparseAllocation]:
+    """
+    The allocation as a SparseAllocation if it is given in a sparse form (a SparseAllocation, or a matrix
+    with a tocoo method like the sparse matrices of SciPy), and None for a dense matrix.
+    """
+    if isinstance(allocations, SparseAllocation):
+        return allocations
+    if hasattr(allocations, "tocoo"):
+        return SparseAllocation.from_matrix(allocations)
+    return None
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,111 @@
+import contextlib
+import io
+import time
+from random import Random
+
+from vcg_cheapest_path import shortest_path, vcg_cheapest_path, vcg_payments
+from vcg_graph import VCGGraph
+
+
+def random_graph(num_nodes: int, num_edges: int, seed: int = 0):
+    """
+    Build a random connected graph as a list of weighted edges: a random spanning tree plus random extra edges.
+    """
+    rng = Random(seed)
+    edges = {}
+
+    for node in range(1, num_nodes):
+        other = rng.randrange(node)
+        edges[other, node] = rng.randint(1, 100)
+
+    while len(edges) < num_edges:
+        u, v = rng.sample(range(num_nodes), 2)
+        edges[min(u, v), max(u, v)] = rng.randint(1, 100)
+
+    return [(f"N{u}", f"N{v}", {'weight': weight}) for (u, v), weight in edges.items()]
+
+
+def benchmark_payments_many(num_nodes: int = 20000, num_edges: int = 100000, num_queries: int = 10000,
+                            num_endpoints: int = 100, baseline_queries: int = 10, seed: int = 0):
+    """
+    Time payments_many on a shared VCGGraph against one vcg_payments call per query.
+
+    Queries pick their endpoints among num_endpoints nodes, like auctions between a set of hubs.
+    The uncached baseline takes about a second per query at the default size, so it is timed
+    on the first baseline_queries queries and extrapolated.
+    """
+    rng = Random(seed)
+    graph = random_graph(num_nodes, num_edges, seed)
+    endpoints = [f"N{node}" for node in rng.sample(range(num_nodes), num_endpoints)]
+    queries = [tuple(rng.sample(endpoints, 2)) for _ in range(num_queries)]
+
+    start_time = time.perf_counter()
+    vcg_graph = VCGGraph(graph)
+    results = vcg_graph.payments_many(queries)
+    batch_time = time.perf_counter() - start_time
+
+    sample = queries[:max(1, min(baseline_queries, num_queries))]
+    start_time = time.perf_counter()
+    for (source, target), result in zip(sample, results):
+        assert vcg_payments(graph, source, target) == result
+    single_time = (time.perf_counter() - start_time) * num_queries / len(sample)
+
+    print(f"{num_queries} queries on {num_edges} edges")
+    print(f"payments_many: {batch_time:.2f} seconds, {len(vcg_graph.cached_nodes())} cached trees")
+    print(f"vcg_payments per query (extrapolated): {single_time:.2f} seconds")
+    print(f"Speedup: x{single_time / batch_time:.1f}")
+
+
+def benchmark_backends(num_nodes: int = 200000, num_edges: int = 1000000, seed: int = 0):
+    """
+    Time shortest_path and vcg_cheapest_path with the NetworkX backend and with the CSR backend,
+    and check that both backends give the same output.
+    """
+    rng = Random(seed)
+    graph = random_graph(num_nodes, num_edges, seed)
+    source, target = (f"N{node}" for node in rng.sample(range(num_nodes), 2))
+
+    outputs = {}
+    for backend in ("networkx", "csr"):
+        start_time = time.perf_counter()
+        path_result = shortest_path(graph, source, target, backend)
+        path_time = time.perf_counter() - start_time
+
+        vcg_output = io.StringIO()
+        start_time = time.perf_counter()
+        with contextlib.redirect_stdout(vcg_output):
+            vcg_cheapest_path(graph, source, target, backend)
+        vcg_time = time.perf_counter() - start_time
+
+        outputs[backend] = (path_result, vcg_output.getvalue())
+        print(f"{backend}: shortest_path {path_time:.2f} seconds, vcg_cheapest_path {vcg_time:.2f} seconds")
+
+    print("Same output:", outputs["networkx"] == outputs["csr"])
+
+
+def benchmark_workers(num_nodes: int = 50000, num_edges: int = 250000, max_workers: int = 4, seed: int = 0):
+    """
+    Time vcg_cheapest_path serially and with 2..max_workers worker processes, and check that the output is the same.
+    """
+    rng = Random(seed)
+    graph = random_graph(num_nodes, num_edges, seed)
+    source, target = (f"N{node}" for node in rng.sample(range(num_nodes), 2))
+
+    outputs = {}
+    for workers in [None] + list(range(2, max_workers + 1)):
+        vcg_output = io.StringIO()
+        start_time = time.perf_counter()
+        with contextlib.redirect_stdout(vcg_output):
+            vcg_cheapest_path(graph, source, target, workers=workers)
+        vcg_time = time.perf_counter() - start_time
+
+        outputs[workers] = vcg_output.getvalue()
+        print(f"workers={workers}: vcg_cheapest_path {vcg_time:.2f} seconds")
+
+    print("Same output:", all(output == outputs[None] for output in outputs.values()))
+
+
+if __name__ == "__main__":
+    benchmark_payments_many()
+    benchmark_backends()
+    benchmark_workers()
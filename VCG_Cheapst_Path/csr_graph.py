@@ -0,0 +1,180 @@
+import heapq
+import math
+from array import array
+from itertools import count
+from typing import List, Optional, Tuple
+
+
+class CSRGraph:
+    """
+    Undirected weighted graph stored in compressed sparse row (CSR) arrays.
+
+    Nodes get integer ids in the order they first appear in the edge list. The neighbours of node u are
+    targets[offsets[u]:offsets[u + 1]], with the matching edge weights in weights. Like nx.Graph,
+    a repeated edge keeps its last weight.
+
+    Parameters:
+        graph (List[Tuple[str, str, dict]]): List of edges with weights.
+
+    Examples:
+        >>> graph = [('A', 'B', {'weight': 2}), ('B', 'C', {'weight': 1}), ('A', 'C', {'weight': 4})]
+        >>> G = CSRGraph(graph)
+        >>> list(G.offsets), list(G.targets), list(G.weights)
+        ([0, 2, 4, 6], [1, 2, 0, 2, 1, 0], [2, 4, 2, 1, 1, 4])
+        >>> G.shortest_path('A', 'C')
+        ['A', 'B', 'C']
+        >>> G.shortest_path('A', 'C', removed_edge=('B', 'C'))
+        ['A', 'C']
+        >>> G.weight('C', 'A')
+        4
+    """
+
+    def __init__(self, graph):
+        self.nodes: List = []
+        self.node_ids = {}
+
+        edges = {}
+        for u, v, data in graph:
+            u_id, v_id = self._node_id(u), self._node_id(v)
+            edges[min(u_id, v_id), max(u_id, v_id)] = data['weight']
+
+        num_nodes = len(self.nodes)
+        degrees = [0] * (num_nodes + 1)
+        for u_id, v_id in edges:
+            degrees[u_id] += 1
+            degrees[v_id] += 1
+
+        self.offsets = array('q', bytes(8 * (num_nodes + 1)))
+        for node in range(num_nodes):
+            self.offsets[node + 1] = self.offsets[node] + degrees[node]
+
+        weight_type = 'q' if all(isinstance(weight, int) for weight in edges.values()) else 'd'
+        self.targets = array('q', bytes(8 * 2 * len(edges)))
+        self.weights = array(weight_type, bytes(8 * 2 * len(edges)))
+
+        position = list(self.offsets[:num_nodes])
+        for (u_id, v_id), weight in edges.items():
+            for a, b in ((u_id, v_id), (v_id, u_id)):
+                self.targets[position[a]] = b
+                self.weights[position[a]] = weight
+                position[a] += 1
+
+    def _node_id(self, node) -> int:
+        if node not in self.node_ids:
+            self.node_ids[node] = len(self.nodes)
+            self.nodes.append(node)
+        return self.node_ids[node]
+
+    def weight(self, u, v):
+        """
+        Weight of the edge between u and v.
+        """
+        u_id, v_id = self.node_ids[u], self.node_ids[v]
+        for k in range(self.offsets[u_id], self.offsets[u_id + 1]):
+            if self.targets[k] == v_id:
+                return self.weights[k]
+        raise KeyError((u, v))
+
+    def bidirectional_dijkstra(self, source: int, target: int,
+                               removed_edge: Optional[Tuple[int, int]] = None) -> Optional[List[int]]:
+        """
+        Bidirectional Dijkstra between two node ids, step for step like nx.bidirectional_dijkstra
+        (which nx.shortest_path runs), so that among paths of equal weight both find the same one.
+
+        Parameters:
+            source (int): Id of the source node.
+            target (int): Id of the target node.
+            removed_edge (Optional[Tuple[int, int]]): Ids of the endpoints of an edge to ignore.
+
+        Returns:
+            Optional[List[int]]: The ids of the nodes of the path, or None if the target is not reachable.
+        """
+        if source == target:
+            return [source]
+
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        removed_u, removed_v = removed_edge if removed_edge is not None else (-1, -1)
+
+        num_nodes = len(self.nodes)
+        settled = [bytearray(num_nodes), bytearray(num_nodes)]
+        seen = [[math.inf] * num_nodes, [math.inf] * num_nodes]
+        parents = [[-1] * num_nodes, [-1] * num_nodes]
+        seen[0][source] = seen[1][target] = 0
+
+        # Both heaps share one counter, like NetworkX
+        counter = count()
+        heaps = [[(0, next(counter), source)], [(0, next(counter), target)]]
+        final_distance, meeting_node = math.inf, -1
+        direction = 1
+
+        while heaps[0] and heaps[1]:
+            direction = 1 - direction
+            distance, _, u = heapq.heappop(heaps[direction])
+            if settled[direction][u]:
+                continue
+            settled[direction][u] = 1
+            if settled[1 - direction][u]:
+                return self._bidirectional_path(parents, meeting_node)
+
+            direction_seen, direction_parents = seen[direction], parents[direction]
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                if settled[direction][v] or (u == removed_u and v == removed_v) or (u == removed_v and v == removed_u):
+                    continue
+                new_distance = distance + weights[k]
+                if new_distance < direction_seen[v]:
+                    direction_seen[v] = new_distance
+                    heapq.heappush(heaps[direction], (new_distance, next(counter), v))
+                    direction_parents[v] = u
+                    if seen[1 - direction][v] < math.inf and new_distance + seen[1 - direction][v] < final_distance:
+                        final_distance, meeting_node = new_distance + seen[1 - direction][v], v
+
+        return None
+
+    @staticmethod
+    def _bidirectional_path(parents: List[List[int]], meeting_node: int) -> List[int]:
+        path = [meeting_node]
+        while parents[0][path[-1]] >= 0:
+            path.append(parents[0][path[-1]])
+        path.reverse()
+
+        node = parents[1][meeting_node]
+        while node >= 0:
+            path.append(node)
+            node = parents[1][node]
+        return path
+
+    def shortest_path(self, source, target, removed_edge: Optional[Tuple] = None) -> List:
+        """
+        Find a shortest path between two nodes, optionally ignoring one edge.
+
+        Parameters:
+            source: Source node.
+            target: Target node.
+            removed_edge (Optional[Tuple]): An edge (u, v) to ignore.
+
+        Returns:
+            List: The nodes of the path, from source to target.
+        """
+        # NetworkX is only imported for its exceptions, when there is one to raise
+        if source not in self.node_ids:
+            import networkx as nx
+            raise nx.NodeNotFound(f"Source {source} is not in G")
+        if target not in self.node_ids:
+            import networkx as nx
+            raise nx.NodeNotFound(f"Target {target} is not in G")
+
+        source_id, target_id = self.node_ids[source], self.node_ids[target]
+        if removed_edge is not None:
+            removed_edge = (self.node_ids.get(removed_edge[0], -1), self.node_ids.get(removed_edge[1], -1))
+
+        path = self.bidirectional_dijkstra(source_id, target_id, removed_edge)
+        if path is None:
+            import networkx as nx
+            raise nx.NetworkXNoPath(f"No path between {source} and {target}.")
+        return [self.nodes[node] for node in path]
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
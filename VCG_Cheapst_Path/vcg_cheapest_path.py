@@ -1,23 +1,62 @@
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
 import networkx as nx
 
+if __package__:
+    from .csr_graph import CSRGraph
+else:
+    from csr_graph import CSRGraph
+
 
-def shortest_path(graph, source, target):
+def create_graph(graph) -> nx.Graph:
     """
-    Find the original shortest path in a graph.
+    Build an undirected NetworkX graph from a list of weighted edges.
 
     Parameters:
         graph (List[Tuple[str, str, dict]]): List of edges with weights.
+
+    Returns:
+        nx.Graph: The graph, with the weight of every edge under 'weight'.
+    """
+    G = nx.Graph()
+
+    for edge in graph:
+        G.add_edge(edge[0], edge[1], weight=edge[2]['weight'])
+
+    return G
+
+
+def shortest_path(graph, source, target, backend: str = "networkx"):
+    """
+    Find the original shortest path in a graph.
+
+    Parameters:
+        graph (List[Tuple[str, str, dict]]): List of edges with weights (or a CSRGraph for the "csr" backend).
         source (str): Source node.
         target (str): Target node.
+        backend (str): "networkx" for a NetworkX graph, or "csr" for the array-backed CSRGraph.
 
     Returns:
         Tuple[float, List[Tuple[Tuple[str, str], float]]]: Tuple containing the sum of the original shortest path weights
         and a list of edges with their weights in the original shortest path.
+
+    Examples:
+        >>> graph = [('A', 'B', {'weight': 2}), ('B', 'C', {'weight': 1}), ('A', 'C', {'weight': 4})]
+        >>> shortest_path(graph, 'A', 'C')
+        (3, [(('A', 'B'), 2), (('B', 'C'), 1)])
+        >>> shortest_path(graph, 'A', 'C', backend="csr")
+        (3, [(('A', 'B'), 2), (('B', 'C'), 1)])
     """
-    G = nx.Graph()
+    if backend == "csr":
+        G = graph if isinstance(graph, CSRGraph) else CSRGraph(graph)
+        path = G.shortest_path(source, target)
+        edges = list(zip(path, path[1:]))
+        weights = [G.weight(u, v) for u, v in edges]
+        return sum(weights), list(zip(edges, weights))
 
-    for edge in graph:
-        G.add_edge(edge[0], edge[1], weight=edge[2]['weight'])
+    G = create_graph(graph)
 
     original_shortest_path = nx.shortest_path(G, source=source, target=target, weight='weight')
     original_shortest_path_weight = sum(G[original_shortest_path[i]][original_shortest_path[i + 1]]['weight']
@@ -31,7 +70,8 @@ def shortest_path(graph, source, target):
     return original_shortest_path_weight, original_result
 
 
-def vcg_cheapest_path(graph, source, target):
+def vcg_cheapest_path(graph, source, target, backend: str = "networkx", workers: Optional[int] = None,
+                      tracer=None):
     """
     Find the original shortest path in a graph and iteratively remove each edge, printing the new shortest path
     and the weight difference compared to the original shortest path.
@@ -40,6 +80,11 @@ def vcg_cheapest_path(graph, source, target):
         graph (List[Tuple[str, str, dict]]): List of edges with weights.
         source (str): Source node.
         target (str): Target node.
+        backend (str): "networkx" to search a copy of the graph without each edge, or "csr" to search
+            the array-backed CSRGraph while skipping the edge, without any copy.
+        workers (Optional[int]): Number of worker processes that search the paths without each edge in parallel.
+            The results are printed in path order, like the serial search.
+        tracer: Optional tracer (see economic_algo.tracing) that counts the Dijkstra runs and times every phase.
      Examples:
         >>> graph = [('A', 'B', {'weight': 2}), ('B', 'C', {'weight': 1}), ('A', 'D', {'weight': 3}),
         ...          ('D', 'C', {'weight': 4}), ('B', 'E', {'weight': 5}), ('C', 'F', {'weight': 2}),
@@ -55,26 +100,55 @@ def vcg_cheapest_path(graph, source, target):
         Weight Difference (considering removed edge): -4
         After removing edge ('C', 'F'), New Shortest Path: ['A', 'B', 'E', 'F']
         Weight Difference (considering removed edge): -5
+        >>> vcg_cheapest_path(graph, source_node, target_node, backend="csr")
+        Original Shortest Path: [(('A', 'B'), 2), (('B', 'C'), 1), (('C', 'F'), 2)]
+        Original Shortest Path Weight: 5
+        After removing edge ('A', 'B'), New Shortest Path: ['A', 'D', 'C', 'F']
+        Weight Difference (considering removed edge): -6
+        After removing edge ('B', 'C'), New Shortest Path: ['A', 'B', 'E', 'F']
+        Weight Difference (considering removed edge): -4
+        After removing edge ('C', 'F'), New Shortest Path: ['A', 'B', 'E', 'F']
+        Weight Difference (considering removed edge): -5
+        >>> vcg_cheapest_path(graph, source_node, target_node, workers=2)
+        Original Shortest Path: [(('A', 'B'), 2), (('B', 'C'), 1), (('C', 'F'), 2)]
+        Original Shortest Path Weight: 5
+        After removing edge ('A', 'B'), New Shortest Path: ['A', 'D', 'C', 'F']
+        Weight Difference (considering removed edge): -6
+        After removing edge ('B', 'C'), New Shortest Path: ['A', 'B', 'E', 'F']
+        Weight Difference (considering removed edge): -4
+        After removing edge ('C', 'F'), New Shortest Path: ['A', 'B', 'E', 'F']
+        Weight Difference (considering removed edge): -5
     """
+    if tracer is not None:
+        tracer.lap(None)
+
+    if backend == "csr":
+        graph = CSRGraph(graph)
 
     # Get the original shortest path and its sum of weights
-    original_shortest_path_weight, original_shortest_path = shortest_path(graph, source, target)
+    original_shortest_path_weight, original_shortest_path = shortest_path(graph, source, target, backend)
+    if tracer is not None:
+        tracer.lap("shortest_path")
+        tracer.count("dijkstra_runs")
     print("Original Shortest Path:", original_shortest_path)
     print("Original Shortest Path Weight:", original_shortest_path_weight)
 
-    # Iterate through each edge in the shortest path, remove it, and print the new shortest path and the weight difference
-    for edge in original_shortest_path:
-        # Create a copy of the original graph to avoid modifying it permanently
-        G_copy = nx.Graph(graph)
+    removed_edges = [edge[0] for edge in original_shortest_path]
+    if workers is None:
+        new_shortest_paths = [shortest_path_without_edge(graph, source, target, removed_edge, backend)
+                              for removed_edge in removed_edges]
+    else:
+        # The graph is sent to every worker once, and only the removed edges are sent per task
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(graph, source, target, backend)) as executor:
+            new_shortest_paths = list(executor.map(worker_shortest_path_without_edge, removed_edges))
+    if tracer is not None:
+        tracer.lap("replacement_paths")
+        tracer.count("dijkstra_runs", len(removed_edges))
 
-        # Remove the current edge from the copy of the graph
-        removed_edge_weight = G_copy[edge[0][0]][edge[0][1]]['weight']
-        G_copy.remove_edge(edge[0][0], edge[0][1])
-
-        # Find the new shortest path for the copy of the graph
-        new_shortest_path = nx.shortest_path(G_copy, source=source, target=target, weight='weight')
-        new_shortest_path_weight = sum(G_copy[new_shortest_path[i]][new_shortest_path[i + 1]]['weight']
-                                       for i in range(len(new_shortest_path) - 1))
+    # Print the new shortest path and the weight difference for each edge in the shortest path, in path order
+    for edge, (new_shortest_path, new_shortest_path_weight) in zip(original_shortest_path, new_shortest_paths):
+        removed_edge_weight = edge[1]
 
         # Calculate the weight difference, considering the weight of the removed edge
         weight_difference = original_shortest_path_weight - (new_shortest_path_weight + removed_edge_weight)
@@ -82,6 +156,209 @@ def vcg_cheapest_path(graph, source, target):
         print(f"After removing edge {edge[0]}, New Shortest Path:", new_shortest_path)
         print(f"Weight Difference (considering removed edge):", weight_difference)
 
+
+def shortest_path_without_edge(graph, source, target, removed_edge, backend: str = "networkx"):
+    """
+    Find the shortest path of a graph after removing one edge, and its weight.
+
+    Parameters:
+        graph: List of edges with weights, a NetworkX graph, or a CSRGraph for the "csr" backend.
+        source (str): Source node.
+        target (str): Target node.
+        removed_edge (Tuple[str, str]): The edge to remove.
+        backend (str): "networkx" or "csr".
+
+    Returns:
+        Tuple[List[str], float]: The new shortest path and its weight.
+    """
+    if backend == "csr":
+        new_shortest_path = graph.shortest_path(source, target, removed_edge=removed_edge)
+        new_shortest_path_weight = sum(graph.weight(new_shortest_path[i], new_shortest_path[i + 1])
+                                       for i in range(len(new_shortest_path) - 1))
+        return new_shortest_path, new_shortest_path_weight
+
+    if isinstance(graph, nx.Graph):
+        # A view without the edge searches the graph in the same order as a copy would, without copying it
+        G_copy = nx.restricted_view(graph, [], [removed_edge])
+    else:
+        # Create a copy of the original graph to avoid modifying it permanently
+        G_copy = nx.Graph(graph)
+
+        # Remove the current edge from the copy of the graph
+        G_copy.remove_edge(removed_edge[0], removed_edge[1])
+
+    # Find the new shortest path for the copy of the graph
+    new_shortest_path = nx.shortest_path(G_copy, source=source, target=target, weight='weight')
+    new_shortest_path_weight = sum(G_copy[new_shortest_path[i]][new_shortest_path[i + 1]]['weight']
+                                   for i in range(len(new_shortest_path) - 1))
+    return new_shortest_path, new_shortest_path_weight
+
+
+# State of a worker process of the parallel vcg_cheapest_path, set once by init_worker
+_worker_state = {}
+
+
+def init_worker(graph, source, target, backend: str):
+    _worker_state['graph'] = graph if backend == "csr" else create_graph(graph)
+    _worker_state['source'] = source
+    _worker_state['target'] = target
+    _worker_state['backend'] = backend
+
+
+def worker_shortest_path_without_edge(removed_edge):
+    return shortest_path_without_edge(_worker_state['graph'], _worker_state['source'], _worker_state['target'],
+                                      removed_edge, _worker_state['backend'])
+
+
+def vcg_payments(graph, source, target, tracer=None) -> Dict[Tuple[str, str], float]:
+    """
+    Calculate the VCG payment of every edge on the cheapest path, with one Dijkstra run from the source
+    and one from the target instead of a new shortest path search for every removed edge.
+
+    The payment of an edge e is the cost of the cheapest path avoiding e, minus the cost of the cheapest
+    path without the weight of e. The cheapest path avoiding e_j = (v_j, v_j+1) leaves the shortest path
+    tree of the source through an edge (u, w), where u hangs below v_0..v_j in the tree and w hangs below
+    v_j+1..v_k, so its cost is dist_source(u) + weight(u, w) + dist_target(w). Every such edge covers a
+    range of path edges, and the cheapest candidates are assigned to the path edges first.
+
+    Parameters:
+        graph (List[Tuple[str, str, dict]]): List of edges with weights.
+        source (str): Source node.
+        target (str): Target node.
+        tracer: Optional tracer (see economic_algo.tracing) that counts the Dijkstra runs and times every phase.
+
+    Returns:
+        Dict[Tuple[str, str], float]: The payment of every edge on the cheapest path, in path order.
+        An edge without any replacement path gets an infinite payment.
+
+    Examples:
+        >>> graph = [('A', 'B', {'weight': 2}), ('B', 'C', {'weight': 1}), ('A', 'D', {'weight': 3}),
+        ...          ('D', 'C', {'weight': 4}), ('B', 'E', {'weight': 5}), ('C', 'F', {'weight': 2}),
+        ...          ('E', 'F', {'weight': 1})]
+        >>> vcg_payments(graph, 'A', 'F')
+        {('A', 'B'): 6, ('B', 'C'): 4, ('C', 'F'): 5}
+        >>> vcg_payments([('A', 'B', {'weight': 1}), ('B', 'C', {'weight': 1})], 'A', 'C')
+        {('A', 'B'): inf, ('B', 'C'): inf}
+    """
+    if tracer is not None:
+        tracer.lap(None)
+
+    G = create_graph(graph)
+    if tracer is not None:
+        tracer.lap("build_graph")
+
+    predecessors_source, distances_source = nx.dijkstra_predecessor_and_distance(G, source, weight='weight')
+    distances_target = nx.single_source_dijkstra_path_length(G, target, weight='weight')
+    if tracer is not None:
+        tracer.lap("dijkstra")
+        tracer.count("dijkstra_runs", 2)
+
+    payments = path_payments(G, source, target, predecessors_source, distances_source, distances_target)
+    if tracer is not None:
+        tracer.lap("payments")
+    return payments
+
+
+def path_payments(G: nx.Graph, source, target, predecessors_source: Dict[str, List[str]],
+                  distances_source: Dict[str, float], distances_target: Dict[str, float],
+                  edges: Optional[List[Tuple[str, str, float]]] = None) -> Dict[Tuple[str, str], float]:
+    """
+    Calculate the VCG payment of every edge on the cheapest path from shortest path trees that were already computed.
+
+    Parameters:
+        G (nx.Graph): The graph.
+        source (str): Source node.
+        target (str): Target node.
+        predecessors_source (Dict[str, List[str]]): Predecessors in the shortest path tree of the source.
+        distances_source (Dict[str, float]): Distances from the source, in the order the nodes were settled.
+        distances_target (Dict[str, float]): Distances from the target.
+        edges (Optional[List[Tuple[str, str, float]]]): The (u, v, weight) edges of G, if they are already listed.
+
+    Returns:
+        Dict[Tuple[str, str], float]: The payment of every edge on the cheapest path, in path order.
+    """
+    if edges is None:
+        edges = G.edges(data='weight')
+
+    path = tree_path(predecessors_source, source, target)
+    path_weight = distances_source[target]
+
+    replacement_costs = replacement_path_costs(edges, path, predecessors_source, distances_source, distances_target)
+
+    return {(path[j], path[j + 1]): replacement_costs[j] - (path_weight - G[path[j]][path[j + 1]]['weight'])
+            for j in range(len(path) - 1)}
+
+
+def tree_path(predecessors: Dict[str, List[str]], source, target) -> List[str]:
+    """
+    Follow the first predecessor of every node, from the target back to the source.
+    """
+    if target not in predecessors:
+        raise nx.NetworkXNoPath(f"Node {target} not reachable from {source}")
+
+    path = [target]
+    while path[-1] != source:
+        path.append(predecessors[path[-1]][0])
+    path.reverse()
+    return path
+
+
+def replacement_path_costs(edges: Iterable[Tuple[str, str, float]], path: List[str], predecessors_source: Dict[str, List[str]],
+                           distances_source: Dict[str, float], distances_target: Dict[str, float]) -> List[float]:
+    """
+    Calculate the cost of the cheapest path avoiding each edge of a shortest path, in one pass over the edges.
+
+    Parameters:
+        edges (Iterable[Tuple[str, str, float]]): The (u, v, weight) edges of the graph.
+        path (List[str]): The shortest path, taken from the shortest path tree of the source.
+        predecessors_source (Dict[str, List[str]]): Predecessors in the shortest path tree of the source.
+        distances_source (Dict[str, float]): Distances from the source, in the order the nodes were settled.
+        distances_target (Dict[str, float]): Distances from the target.
+
+    Returns:
+        List[float]: The cost of the cheapest path avoiding path edge j, for every j.
+    """
+    # Every node is labeled with the last path node on its tree path from the source
+    path_index = {node: index for index, node in enumerate(path)}
+    labels = {}
+    for node in distances_source:
+        labels[node] = path_index[node] if node in path_index else labels[predecessors_source[node][0]]
+
+    candidates = []
+    for u, w, weight in edges:
+        label_u = labels.get(u)
+        label_w = labels.get(w)
+        if label_u == label_w or label_u is None or label_w is None:
+            continue
+        if label_u > label_w:
+            u, w, label_u, label_w = w, u, label_w, label_u
+        if label_w == label_u + 1 and u == path[label_u] and w == path[label_w]:
+            # The path edge itself cannot replace itself
+            continue
+        candidates.append((distances_source[u] + weight + distances_target[w], label_u, label_w))
+    candidates.sort()
+
+    # Cheapest candidates first, each path edge takes the first candidate that covers it
+    num_edges = len(path) - 1
+    costs = [math.inf] * num_edges
+    next_free = list(range(num_edges + 1))
+
+    def find_free(j):
+        while next_free[j] != j:
+            next_free[j] = next_free[next_free[j]]
+            j = next_free[j]
+        return j
+
+    for cost, first, last in candidates:
+        j = find_free(first)
+        while j < last:
+            costs[j] = cost
+            next_free[j] = j + 1
+            j = find_free(j + 1)
+
+    return costs
+
+
 if __name__ == "__main__":
     import doctest
     doctest.testmod()
\ No newline at end of file
@@ -0,0 +1,246 @@
+import math
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+import networkx as nx
+import numpy as np
+
+if __package__:
+    from .vcg_cheapest_path import create_graph
+else:
+    from vcg_cheapest_path import create_graph
+
+
+class VCGGraph:
+    """
+    A graph that runs many VCG cheapest path auctions, building the NetworkX graph only once.
+
+    The shortest path tree of every node that was used as a source or a target is cached as NumPy arrays,
+    and the least recently used trees are evicted once the cache goes over its memory budget. Since the graph
+    is undirected, the tree of a node serves both the auctions where it is the source and those where it is
+    the target. The endpoints and the weights of the edges are kept as arrays too, so a query with cached trees
+    only runs vectorized passes over the nodes and the edges.
+
+    Parameters:
+        graph (List[Tuple[str, str, dict]]): List of edges with weights.
+        memory_budget (int): Approximate number of bytes the cached trees may take.
+
+    Examples:
+        >>> graph = [('A', 'B', {'weight': 2}), ('B', 'C', {'weight': 1}), ('A', 'D', {'weight': 3}),
+        ...          ('D', 'C', {'weight': 4}), ('B', 'E', {'weight': 5}), ('C', 'F', {'weight': 2}),
+        ...          ('E', 'F', {'weight': 1})]
+        >>> vcg_graph = VCGGraph(graph)
+        >>> vcg_graph.payments('A', 'F')
+        {('A', 'B'): 6, ('B', 'C'): 4, ('C', 'F'): 5}
+        >>> vcg_graph.payments_many([('A', 'F'), ('D', 'F'), ('A', 'C')])
+        [{('A', 'B'): 6, ('B', 'C'): 4, ('C', 'F'): 5}, {('D', 'C'): 6, ('C', 'F'): 7}, {('A', 'B'): 6, ('B', 'C'): 5}]
+        >>> sorted(vcg_graph.cached_nodes())
+        ['A', 'C', 'D', 'F']
+    """
+
+    def __init__(self, graph, memory_budget: int = 256 * 1024 * 1024):
+        self.G = create_graph(graph)
+        self.memory_budget = memory_budget
+        self._trees: "OrderedDict[str, Tuple[np.ndarray, np.ndarray, int]]" = OrderedDict()
+        self._trees_size = 0
+
+        self.nodes = list(self.G)
+        self.node_ids = {node: node_id for node_id, node in enumerate(self.nodes)}
+        edges = list(self.G.edges(data='weight'))
+        self.edge_u = np.array([self.node_ids[u] for u, _, _ in edges], dtype=np.int32)
+        self.edge_v = np.array([self.node_ids[v] for _, v, _ in edges], dtype=np.int32)
+        self.edge_weights = np.array([weight for _, _, weight in edges], dtype=np.float64)
+        # Integer weights give integer payments, like vcg_payments
+        self._integer_weights = all(isinstance(weight, int) for _, _, weight in edges)
+
+    def cached_nodes(self) -> List[str]:
+        return list(self._trees)
+
+    def shortest_path_tree(self, node) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the shortest path tree of a node, from the cache if possible.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The parent id of every node id (the first predecessor of NetworkX,
+            -1 for the node itself and the unreachable nodes), and the distance of every node id (inf if unreachable).
+        """
+        if node in self._trees:
+            self._trees.move_to_end(node)
+            parents, distances, _ = self._trees[node]
+            return parents, distances
+
+        predecessors, node_distances = nx.dijkstra_predecessor_and_distance(self.G, node, weight='weight')
+        parents = np.full(len(self.nodes), -1, dtype=np.int32)
+        distances = np.full(len(self.nodes), np.inf)
+        for other, other_predecessors in predecessors.items():
+            other_id = self.node_ids[other]
+            distances[other_id] = node_distances[other]
+            if other_predecessors:
+                parents[other_id] = self.node_ids[other_predecessors[0]]
+        size = parents.nbytes + distances.nbytes
+
+        while self._trees and self._trees_size + size > self.memory_budget:
+            _, (_, _, evicted_size) = self._trees.popitem(last=False)
+            self._trees_size -= evicted_size
+
+        if size <= self.memory_budget:
+            self._trees[node] = (parents, distances, size)
+            self._trees_size += size
+
+        return parents, distances
+
+    def payments(self, source, target) -> Dict[Tuple[str, str], float]:
+        """
+        Calculate the VCG payment of every edge on the cheapest path from source to target.
+        The result is the same as vcg_payments on the edge list of the graph.
+        """
+        parents_source, distances_source = self.shortest_path_tree(source)
+        _, distances_target = self.shortest_path_tree(target)
+
+        source_id, target_id = self.node_ids[source], self.node_ids[target]
+        if distances_source[target_id] == np.inf:
+            raise nx.NetworkXNoPath(f"Node {target} not reachable from {source}")
+
+        path = [target_id]
+        while path[-1] != source_id:
+            path.append(int(parents_source[path[-1]]))
+        path.reverse()
+        path_weight = self._number(distances_source[target_id])
+
+        replacement_costs = array_replacement_path_costs(self.edge_u, self.edge_v, self.edge_weights, path,
+                                                         parents_source, distances_source, distances_target)
+
+        payments = {}
+        for j in range(len(path) - 1):
+            u, v = self.nodes[path[j]], self.nodes[path[j + 1]]
+            payments[u, v] = self._number(replacement_costs[j]) - (path_weight - self.G[u][v]['weight'])
+        return payments
+
+    def _number(self, value: float):
+        return int(value) if self._integer_weights and value != math.inf else float(value)
+
+    def payments_many(self, queries: Iterable[Tuple[str, str]]) -> List[Dict[Tuple[str, str], float]]:
+        """
+        Calculate the VCG payments of many (source, target) auctions.
+
+        Queries are grouped by the endpoint they share with most other queries, and each group runs
+        back to back, so the tree of the shared endpoint stays in the cache for the whole group.
+
+        Returns:
+            List[Dict[Tuple[str, str], float]]: The payments of every query, in the order of the queries.
+        """
+        queries = list(queries)
+
+        endpoint_counts = defaultdict(int)
+        for source, target in queries:
+            endpoint_counts[source] += 1
+            endpoint_counts[target] += 1
+
+        groups = defaultdict(list)
+        for index, (source, target) in enumerate(queries):
+            shared = source if endpoint_counts[source] >= endpoint_counts[target] else target
+            groups[shared].append(index)
+
+        results = [None] * len(queries)
+        for shared in sorted(groups, key=lambda node: len(groups[node]), reverse=True):
+            for index in groups[shared]:
+                results[index] = self.payments(*queries[index])
+
+        return results
+
+
+def array_replacement_path_costs(edge_u: np.ndarray, edge_v: np.ndarray, edge_weights: np.ndarray, path: List[int],
+                                 parents_source: np.ndarray, distances_source: np.ndarray,
+                                 distances_target: np.ndarray) -> List[float]:
+    """
+    replacement_path_costs of vcg_cheapest_path over arrays of node ids.
+
+    Every node is labeled with the last path node on its tree path from the source by jumping over the
+    parents (every jump doubles the distance it covers), and the candidates of all the edges are computed
+    in one pass. Only the cheapest candidate of every (first, last) range of path edges can be used,
+    so the candidates are reduced to one per range before they are assigned to the path edges.
+
+    Examples:
+        >>> path = [0, 1, 2]
+        >>> parents_source = np.array([-1, 0, 1, 0])
+        >>> distances_source = np.array([0.0, 2.0, 3.0, 3.0])
+        >>> distances_target = np.array([3.0, 1.0, 0.0, 4.0])
+        >>> edge_u, edge_v = np.array([0, 1, 0, 3]), np.array([1, 2, 3, 2])
+        >>> array_replacement_path_costs(edge_u, edge_v, np.array([2.0, 1.0, 3.0, 4.0]), path, parents_source,
+        ...                              distances_source, distances_target)
+        [7.0, 7.0]
+    """
+    num_nodes = len(parents_source)
+    num_edges = len(path) - 1
+    path_ids = np.array(path, dtype=np.int32)
+
+    # Path nodes point to themselves, and the unreachable nodes to an extra node num_nodes
+    jumps = np.append(np.where(parents_source < 0, num_nodes, parents_source), num_nodes).astype(np.int32)
+    jumps[path_ids] = path_ids
+    while True:
+        next_jumps = jumps[jumps]
+        if np.array_equal(next_jumps, jumps):
+            break
+        jumps = next_jumps
+    path_index = np.full(num_nodes + 1, -1, dtype=np.int32)
+    path_index[path_ids] = np.arange(len(path))
+    labels = path_index[jumps[:num_nodes]]
+
+    label_u, label_v = labels[edge_u], labels[edge_v]
+    crossing = np.flatnonzero((label_u >= 0) & (label_v >= 0) & (label_u != label_v))
+    label_u, label_v = label_u[crossing], label_v[crossing]
+    crossing_u, crossing_v = edge_u[crossing], edge_v[crossing]
+    swap = label_u > label_v
+    first = np.minimum(label_u, label_v)
+    last = np.maximum(label_u, label_v)
+    u = np.where(swap, crossing_v, crossing_u)
+    w = np.where(swap, crossing_u, crossing_v)
+
+    # The path edge itself cannot replace itself
+    replacing = np.flatnonzero(~((last == first + 1) & (u == path_ids[first]) & (w == path_ids[last])))
+    first, last, u, w = first[replacing], last[replacing], u[replacing], w[replacing]
+    costs = distances_source[u] + edge_weights[crossing[replacing]] + distances_target[w]
+
+    num_ranges = len(path) * len(path)
+    ranges = first.astype(np.int64) * len(path) + last
+    if num_ranges <= 4 * len(costs) + 4096:
+        # The cheapest cost of every range, in a table of all the ranges
+        table = np.full(num_ranges, np.inf)
+        np.minimum.at(table, ranges, costs)
+        range_keys = np.flatnonzero(table < np.inf)
+        range_costs = table[range_keys]
+    else:
+        order = np.argsort(costs, kind='stable')
+        range_keys, cheapest = np.unique(ranges[order], return_index=True)
+        range_costs = costs[order][cheapest]
+    order = np.argsort(range_costs, kind='stable')
+    range_keys, range_costs = range_keys[order], range_costs[order]
+
+    # Cheapest candidates first, each path edge takes the first candidate that covers it
+    replacement_costs = [math.inf] * num_edges
+    next_free = list(range(num_edges + 1))
+    remaining = num_edges
+
+    def find_free(j):
+        while next_free[j] != j:
+            next_free[j] = next_free[next_free[j]]
+            j = next_free[j]
+        return j
+
+    for cost, candidate_first, candidate_last in zip(range_costs.tolist(), (range_keys // len(path)).tolist(),
+                                                     (range_keys % len(path)).tolist()):
+        if remaining == 0:
+            break
+        j = find_free(candidate_first)
+        while j < candidate_last:
+            replacement_costs[j] = cost
+            remaining -= 1
+            next_free[j] = j + 1
+            j = find_free(j + 1)
+
+    return replacement_costs
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,103 @@
+"""
+All the algorithms of the repository behind one importable package.
+
+The algorithms live in the directories of the repository. Every directory is a subpackage
+(economic_algo.egalitarian, economic_algo.pareto, economic_algo.decomposition and economic_algo.vcg) whose path
+points to it, so its modules are imported under the package without touching sys.path.
+Nothing is loaded when the package is imported: the module of an algorithm is imported the first
+time the algorithm is accessed, and NetworkX, NumPy and matplotlib only load with the modules
+(or the code paths) that need them. This keeps the start of short-lived worker processes cheap.
+The solvers can be profiled by passing them an economic_algo.tracing.Tracer, and repeated instances
+can be answered from the cache of economic_algo.cache.
+
+Examples:
+    >>> import economic_algo
+    >>> economic_algo.egalitarian_allocation([1.0, 4.0, 3.0], [6.0, 4.0, 6.0])
+    Player 0 gets items 1, 2 with value of 7.0
+    Player 1 gets items 0 with value of 6.0
+    >>> economic_algo.find_flow_decomposition([100, 200, 150], [{0}, {0}, {1, 2}])
+    (None, [1, 2])
+
+    Importing the package in a fresh interpreter must stay under the import-time budget,
+    without loading any of the heavy dependencies:
+
+    >>> import_time, heavy_modules = measure_import_time()
+    >>> import_time < IMPORT_TIME_BUDGET, heavy_modules
+    (True, [])
+
+    The modules of the algorithms are only loaded under the package, never as top-level modules,
+    and CSRGraph does not need NetworkX:
+
+    >>> measure_import_time("import economic_algo; economic_algo.CSRGraph; economic_algo.anytime_allocation",
+    ...                     ("networkx", "csr_graph", "anytime", "state_store", "economic_algo.vcg.csr_graph"))[1]
+    ['economic_algo.vcg.csr_graph']
+"""
+import importlib
+import os
+import sys
+
+# Seconds that "import economic_algo" may take in a fresh interpreter
+IMPORT_TIME_BUDGET = 0.1
+
+HEAVY_MODULES = ("matplotlib", "networkx", "numpy")
+
+_REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Name -> (subpackage, module) of every algorithm the package exposes
+_ALGORITHMS = {
+    'egalitarian_allocation': ("egalitarian", "egalitarian_allocation"),
+    'max_mul_values': ("egalitarian", "max_mul_values"),
+    'iter_egalitarian_allocation': ("egalitarian", "anytime"),
+    'iter_max_mul_values': ("egalitarian", "anytime"),
+    'anytime_allocation': ("egalitarian", "anytime"),
+    'nash_welfare_allocation': ("egalitarian", "nash_welfare"),
+    'find_nash_welfare_allocation': ("egalitarian", "nash_welfare"),
+    'egalitarian_allocation_n_players': ("egalitarian", "n_player_allocation"),
+    'find_egalitarian_allocation_n_players': ("egalitarian", "n_player_allocation"),
+    'is_pareto_efficient': ("pareto", "pareto_efficinet"),
+    'improve_pareto': ("pareto", "pareto_efficinet"),
+    'create_exchange_graph': ("pareto", "pareto_efficinet"),
+    'ExchangeGraph': ("pareto", "exchange_graph"),
+    'SparseAllocation': ("pareto", "sparse_allocation"),
+    'find_decomposition': ("decomposition", "find_decomposition"),
+    'find_flow_decomposition': ("decomposition", "find_decomposition"),
+    'vcg_cheapest_path': ("vcg", "vcg_cheapest_path"),
+    'vcg_payments': ("vcg", "vcg_cheapest_path"),
+    'shortest_path': ("vcg", "vcg_cheapest_path"),
+    'VCGGraph': ("vcg", "vcg_graph"),
+    'CSRGraph': ("vcg", "csr_graph"),
+}
+
+__all__ = list(_ALGORITHMS)
+
+
+def __getattr__(name: str):
+    if name not in _ALGORITHMS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    package, module_name = _ALGORITHMS[name]
+    value = getattr(importlib.import_module(f"{__name__}.{package}.{module_name}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__)
+
+
+def measure_import_time(statement: str = "import economic_algo",
+                        modules: tuple[str, ...] = HEAVY_MODULES) -> tuple[float, list[str]]:
+    """
+    Run an import statement in a fresh interpreter, and return the seconds it took
+    and which of the given modules (the heavy dependencies by default) it loaded.
+    """
+    import subprocess
+
+    code = ("import sys, time\n"
+            "start_time = time.perf_counter()\n"
+            f"{statement}\n"
+            "print(time.perf_counter() - start_time)\n"
+            f"print(','.join(name for name in {modules!r} if name in sys.modules))\n")
+    output = subprocess.run([sys.executable, "-c", code], cwd=_REPOSITORY, capture_output=True, text=True,
+                            check=True).stdout.splitlines()
+    return float(output[0]), [name for name in output[1].split(',') if name]
@@ -0,0 +1,285 @@
+"""
+Headless benchmark suite for the algorithms of the repository.
+
+Every benchmark runs an algorithm on seeded instances of growing size, both random and adversarial
+(instances built to defeat the pruning or shortcuts of the algorithm), and records repeated perf_counter
+timings after a warmup, and the peak memory of one run measured with tracemalloc.
+The results are rows of plain values, written as JSON or CSV so runs can be compared with compare_results.
+
+Run it with: python -m economic_algo.benchmark --json results.json
+"""
+import contextlib
+import csv
+import io
+import json
+import statistics
+import time
+import tracemalloc
+from random import Random
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import economic_algo
+
+KINDS = ("random", "adversarial")
+
+
+def allocation_instance(size: int, kind: str, rng: Random) -> tuple:
+    """
+    Values of two players for size items. The adversarial values are distinct and almost equal
+    for both players, so no two situations share a value pair and the greedy bound is tight only late.
+    """
+    if kind == "adversarial":
+        values1 = [1000.0 + rng.random() for _ in range(size)]
+        return values1, [value + rng.random() * 1e-3 for value in values1]
+    return [float(rng.randint(1, 100)) for _ in range(size)], [float(rng.randint(1, 100)) for _ in range(size)]
+
+
+def pareto_instance(size: int, kind: str, rng: Random) -> tuple:
+    """
+    Valuations and an allocation of size players over 2 * size items. In the adversarial allocation,
+    every player holds only the items it values least, so the exchange graph is full of negative cycles.
+    """
+    num_items = 2 * size
+    valuations = [[rng.randint(1, 100) for _ in range(num_items)] for _ in range(size)]
+
+    allocations = [[0.0] * num_items for _ in range(size)]
+    for item in range(num_items):
+        if kind == "adversarial":
+            owner = min(range(size), key=lambda player: valuations[player][item])
+            allocations[owner][item] = 1.0
+        else:
+            allocations[rng.randrange(size)][item] = 1.0
+
+    return valuations, allocations
+
+
+def decomposition_instance(size: int, kind: str, rng: Random) -> tuple:
+    """
+    Costs of items and the preferences of size players. A random player supports 20 of size // 10 items.
+    In the adversarial instance every player supports every one of size // 100 items.
+    """
+    if kind == "adversarial":
+        num_items = max(1, size // 100)
+        preferences = [set(range(num_items)) for _ in range(size)]
+    else:
+        num_items = max(20, size // 10)
+        preferences = [set(rng.sample(range(num_items), 20)) for _ in range(size)]
+    return [rng.randint(1, 1000) for _ in range(num_items)], preferences
+
+
+def vcg_instance(size: int, kind: str, rng: Random) -> tuple:
+    """
+    A graph of size nodes with the source and the target. The random graph is a cycle through all the nodes
+    in a random order plus random chords, so no edge is a bridge and every VCG payment is finite.
+    The adversarial graph is a ladder between its two ends, so the path is long and every edge has a detour.
+    """
+    if kind == "adversarial":
+        rungs = max(2, size // 2)
+        edges = {}
+        for k in range(rungs):
+            edges[f"A{k}", f"B{k}"] = rng.randint(50, 100)
+            if k + 1 < rungs:
+                edges[f"A{k}", f"A{k + 1}"] = rng.randint(1, 10)
+                edges[f"B{k}", f"B{k + 1}"] = rng.randint(1, 10)
+        graph = [(u, v, {'weight': weight}) for (u, v), weight in edges.items()]
+        return graph, "A0", f"A{rungs - 1}"
+
+    order = list(range(size))
+    rng.shuffle(order)
+    edges = {}
+    for k in range(size):
+        u, v = order[k - 1], order[k]
+        edges[min(u, v), max(u, v)] = rng.randint(1, 100)
+    for _ in range(size):
+        u, v = rng.sample(range(size), 2)
+        edges[min(u, v), max(u, v)] = rng.randint(1, 100)
+    graph = [(f"N{u}", f"N{v}", {'weight': weight}) for (u, v), weight in edges.items()]
+    return graph, "N0", f"N{size - 1}"
+
+
+# Algorithm -> (instance generator, default sizes)
+BENCHMARKS: Dict[str, Tuple[Callable[[int, str, Random], tuple], List[int]]] = {
+    'egalitarian_allocation': (allocation_instance, [8, 12, 16]),
+    'max_mul_values': (allocation_instance, [8, 10, 12]),
+    'is_pareto_efficient': (pareto_instance, [10, 50, 100]),
+    'improve_pareto': (pareto_instance, [5, 10, 20]),
+    'find_decomposition': (decomposition_instance, [1000, 4000, 10000]),
+    'vcg_cheapest_path': (vcg_instance, [100, 250, 500]),
+}
+
+
+def measure(function: Callable, arguments: tuple, repeats: int = 5, warmup: int = 1) -> Dict[str, float]:
+    """
+    Time a function with perf_counter after warmup runs, and measure the peak memory of one more run.
+    Whatever the function prints is discarded.
+
+    Examples:
+        >>> result = measure(sorted, ([3, 1, 2],), repeats=3)
+        >>> sorted(result)
+        ['max_seconds', 'mean_seconds', 'median_seconds', 'min_seconds', 'peak_bytes', 'repeats']
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(warmup):
+            function(*arguments)
+
+        times = []
+        for _ in range(repeats):
+            start_time = time.perf_counter()
+            function(*arguments)
+            times.append(time.perf_counter() - start_time)
+
+        # tracemalloc slows the code down, so the memory is measured on a separate run
+        tracemalloc.start()
+        try:
+            function(*arguments)
+            _, peak_bytes = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {
+        'repeats': repeats,
+        'min_seconds': min(times),
+        'median_seconds': statistics.median(times),
+        'mean_seconds': statistics.fmean(times),
+        'max_seconds': max(times),
+        'peak_bytes': peak_bytes,
+    }
+
+
+def run_benchmarks(algorithms: Optional[Iterable[str]] = None, sizes: Optional[List[int]] = None,
+                   kinds: Iterable[str] = KINDS, repeats: int = 5, warmup: int = 1, seed: int = 0) -> List[dict]:
+    """
+    Run the benchmarks and return one row per algorithm, instance kind and size.
+
+    Args:
+        algorithms (Optional[Iterable[str]]): Names from BENCHMARKS, all of them by default.
+        sizes (Optional[List[int]]): Instance sizes, the default sizes of every algorithm by default.
+        kinds (Iterable[str]): "random" and/or "adversarial".
+        repeats (int): Number of timed runs per instance.
+        warmup (int): Number of untimed runs before them.
+        seed (int): Seed of the instance generators, the same seed gives the same instances.
+
+    Returns:
+        List[dict]: The rows, with the algorithm, kind, size and seed and the results of measure.
+
+    Examples:
+        >>> rows = run_benchmarks(['find_decomposition'], sizes=[20], kinds=['random'], repeats=1, warmup=0)
+        >>> [(row['algorithm'], row['kind'], row['size']) for row in rows]
+        [('find_decomposition', 'random', 20)]
+    """
+    rows = []
+    for algorithm in (algorithms if algorithms is not None else BENCHMARKS):
+        generator, default_sizes = BENCHMARKS[algorithm]
+        function = getattr(economic_algo, algorithm)
+
+        for kind in kinds:
+            for size in (sizes if sizes is not None else default_sizes):
+                arguments = generator(size, kind, Random(f"{seed}-{algorithm}-{kind}-{size}"))
+                row = {'algorithm': algorithm, 'kind': kind, 'size': size, 'seed': seed}
+                row.update(measure(function, arguments, repeats, warmup))
+                rows.append(row)
+
+    return rows
+
+
+def compare_results(baseline: List[dict], current: List[dict]) -> List[dict]:
+    """
+    Compare the median times of two runs, for the benchmarks they share.
+    A speedup above 1 means the current run is faster.
+
+    Examples:
+        >>> baseline = [{'algorithm': 'a', 'kind': 'random', 'size': 1, 'median_seconds': 2.0}]
+        >>> current = [{'algorithm': 'a', 'kind': 'random', 'size': 1, 'median_seconds': 0.5}]
+        >>> compare_results(baseline, current)
+        [{'algorithm': 'a', 'kind': 'random', 'size': 1, 'baseline_seconds': 2.0, 'current_seconds': 0.5, 'speedup': 4.0}]
+    """
+    baseline_times = {(row['algorithm'], row['kind'], row['size']): row['median_seconds'] for row in baseline}
+
+    comparison = []
+    for row in current:
+        key = (row['algorithm'], row['kind'], row['size'])
+        if key in baseline_times:
+            comparison.append({'algorithm': key[0], 'kind': key[1], 'size': key[2],
+                               'baseline_seconds': baseline_times[key], 'current_seconds': row['median_seconds'],
+                               'speedup': baseline_times[key] / row['median_seconds']})
+    return comparison
+
+
+def write_json(rows: List[dict], path: str):
+    with open(path, 'w') as file:
+        json.dump(rows, file, indent=2)
+
+
+def read_json(path: str) -> List[dict]:
+    with open(path) as file:
+        return json.load(file)
+
+
+def write_csv(rows: List[dict], path: str):
+    with open(path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=list(rows[0]) if rows else [])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def plot_results(rows: List[dict], path: str):
+    """
+    Save a plot of the median time per size, one panel per algorithm and one line per instance kind.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    algorithms = list(dict.fromkeys(row['algorithm'] for row in rows))
+    fig, axes = plt.subplots(1, len(algorithms), figsize=(4 * len(algorithms), 4), squeeze=False)
+
+    for axis, algorithm in zip(axes[0], algorithms):
+        for kind in dict.fromkeys(row['kind'] for row in rows if row['algorithm'] == algorithm):
+            kind_rows = [row for row in rows if row['algorithm'] == algorithm and row['kind'] == kind]
+            axis.plot([row['size'] for row in kind_rows], [row['median_seconds'] for row in kind_rows],
+                      marker='o', label=kind)
+        axis.set_title(algorithm)
+        axis.set_xlabel("Size")
+        axis.set_ylabel("Median time (seconds)")
+        axis.legend()
+
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def main(arguments: Optional[List[str]] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the algorithms of the repository.")
+    parser.add_argument("--algorithms", nargs="+", choices=list(BENCHMARKS))
+    parser.add_argument("--sizes", nargs="+", type=int)
+    parser.add_argument("--kinds", nargs="+", choices=KINDS, default=list(KINDS))
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    parser.add_argument("--csv", help="Write the results to this CSV file")
+    parser.add_argument("--plot", help="Save a plot of the results to this image file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare with")
+    options = parser.parse_args(arguments)
+
+    rows = run_benchmarks(options.algorithms, options.sizes, options.kinds, options.repeats, options.warmup,
+                          options.seed)
+    for row in rows:
+        print(f"{row['algorithm']} {row['kind']} size={row['size']}: median {row['median_seconds']:.4f} seconds, "
+              f"peak {row['peak_bytes'] / 1024:.0f} KiB")
+
+    if options.json:
+        write_json(rows, options.json)
+    if options.csv:
+        write_csv(rows, options.csv)
+    if options.plot:
+        plot_results(rows, options.plot)
+    if options.baseline:
+        for row in compare_results(read_json(options.baseline), rows):
+            print(f"{row['algorithm']} {row['kind']} size={row['size']}: x{row['speedup']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+A result cache shared by the solvers, for traffic that repeats the same instances.
+
+Every instance is first put in a canonical form, so instances that only differ by the order of their items,
+players or edges share one entry, and the canonical form is hashed into the key. The entries live in a
+bounded in-memory LRU, and optionally in a sqlite file that survives the process and is shared between
+processes. The sqlite file holds the results as JSON, so reading a tampered file cannot run code.
+The cached_* functions solve the canonical instance, and translate the result back when the canonical
+form moved the items around.
+"""
+import hashlib
+import json
+import sqlite3
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import economic_algo
+
+
+class SolverCache:
+    """
+    LRU cache of solver results, with an optional sqlite tier.
+
+    Parameters:
+        max_entries (int): Number of results kept in memory, the least recently used are evicted first.
+        path (Optional[str]): A sqlite file where every result is also stored, None to keep results in memory only.
+            The results must be JSON serializable, and come back from the file with lists in place of tuples.
+
+    Examples:
+        >>> cache = SolverCache(max_entries=2)
+        >>> cache.get_or_compute("square", 3, lambda: 9)
+        9
+        >>> cache.get_or_compute("square", 3, lambda: 0)
+        9
+        >>> cache.stats()
+        {'hits': 1, 'disk_hits': 0, 'misses': 1, 'evictions': 0, 'entries': 1}
+    """
+
+    def __init__(self, max_entries: int = 1024, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, object]" = OrderedDict()
+        self._stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+
+        self._connection = None
+        if path is not None:
+            self._connection = sqlite3.connect(path)
+            self._connection.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB)")
+            self._connection.commit()
+
+    def get_or_compute(self, solver: str, canonical_instance, compute: Callable[[], object]):
+        """
+        Return the cached result of a solver on a canonical instance, or compute and cache it.
+        """
+        key = instance_key(solver, canonical_instance)
+
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return self._entries[key]
+
+        if self._connection is not None:
+            row = self._connection.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                try:
+                    result = json.loads(row[0])
+                except ValueError:
+                    # Not a result written by this cache, so it is computed again and replaced
+                    result = None
+                else:
+                    self._stats['disk_hits'] += 1
+                    self._remember(key, result)
+                    return result
+
+        self._stats['misses'] += 1
+        result = compute()
+        self._remember(key, result)
+        if self._connection is not None:
+            self._connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?)", (key, json.dumps(result)))
+            self._connection.commit()
+        return result
+
+    def _remember(self, key: str, result):
+        self._entries[key] = result
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self._stats, entries=len(self._entries))
+
+    def clear(self):
+        """
+        Empty the cache and its sqlite tier, and reset the statistics.
+        """
+        self._entries.clear()
+        self._stats = dict.fromkeys(self._stats, 0)
+        if self._connection is not None:
+            self._connection.execute("DELETE FROM results")
+            self._connection.commit()
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+# The cache used by the cached_* functions when none is given
+shared_cache = SolverCache()
+
+
+def instance_key(solver: str, canonical_instance) -> str:
+    """
+    Hash a canonical instance into a key. The repr of floats is exact, so only equal instances share a key.
+
+    Examples:
+        >>> instance_key("a", (1.0, 2.0)) == instance_key("a", (1.0, 2.0)), instance_key("a", (1.0,)) == instance_key("b", (1.0,))
+        (True, False)
+    """
+    return solver + ":" + hashlib.sha256(repr(canonical_instance).encode()).hexdigest()
+
+
+def cached_egalitarian_allocation(values1: List[float], values2: List[float], cache: Optional[SolverCache] = None) \
+        -> Tuple[List[int], List[int], float]:
+    """
+    The egalitarian allocation of two players, through the cache.
+
+    The items are sorted by their pair of values, so the same items in any order share one entry,
+    and the items of the cached allocation are translated back to the order of the request.
+
+    Returns:
+        Tuple[List[int], List[int], float]: Items of Player 0, items of Player 1, and the egalitarian value.
+
+    Examples:
+        >>> cache = SolverCache()
+        >>> cached_egalitarian_allocation([1.0, 4.0, 3.0], [6.0, 4.0, 6.0], cache)
+        ([1, 2], [0], 6.0)
+        >>> cached_egalitarian_allocation([4.0, 3.0, 1.0], [4.0, 6.0, 6.0], cache)
+        ([0, 1], [2], 6.0)
+        >>> cache.stats()['hits']
+        1
+    """
+    cache = cache if cache is not None else shared_cache
+    order = sorted(range(len(values1)), key=lambda i: (values1[i], values2[i]))
+    sorted_values1 = tuple(values1[i] for i in order)
+    sorted_values2 = tuple(values2[i] for i in order)
+
+    def compute():
+        items0, items1, _, _ = economic_algo.anytime_allocation(list(sorted_values1), list(sorted_values2))
+        return items0, items1
+
+    sorted_items0, sorted_items1 = cache.get_or_compute("egalitarian_allocation", (sorted_values1, sorted_values2),
+                                                        compute)
+    items0 = sorted(order[i] for i in sorted_items0)
+    items1 = sorted(order[i] for i in sorted_items1)
+    value = min(sum(values1[i] for i in items0), sum(values2[i] for i in items1))
+    return items0, items1, value
+
+
+def cached_is_pareto_efficient(valuations: List[List[float]], allocations: List[List[float]],
+                               cache: Optional[SolverCache] = None) -> bool:
+    """
+    is_pareto_efficient through the cache. Renaming the players or the items does not change the answer,
+    so the players (the rows) and the items (the columns) are put in a canonical order (see canonical_order).
+    The allocation may be sparse like for is_pareto_efficient, and a sparse allocation shares its entry
+    with the same allocation given dense.
+
+    Examples:
+        >>> cache = SolverCache()
+        >>> cached_is_pareto_efficient([[3, 1, 6], [6, 3, 1], [1, 6, 3]], [[1, 0, 0], [0, 1, 0], [0, 0, 1]], cache)
+        False
+        >>> cached_is_pareto_efficient([[1, 6, 3], [3, 1, 6], [6, 3, 1]], [[0, 0, 1], [1, 0, 0], [0, 1, 0]], cache)
+        False
+        >>> cache.stats()['hits']
+        1
+        >>> sparse_allocations = economic_algo.SparseAllocation(3, 3, [(0, 2, 1), (1, 0, 1), (2, 1, 1)])
+        >>> cached_is_pareto_efficient([[1, 6, 3], [3, 1, 6], [6, 3, 1]], sparse_allocations, cache)
+        False
+        >>> cache.stats()['hits']
+        2
+    """
+    cache = cache if cache is not None else shared_cache
+    num_players = len(valuations)
+    num_items = len(valuations[0]) if num_players else 0
+
+    # The canonical instance lists every (valuation, amount) pair anyway, so a sparse allocation is made dense
+    from economic_algo.pareto.sparse_allocation import as_sparse_allocation
+    sparse_allocations = as_sparse_allocation(allocations)
+    if sparse_allocations is not None:
+        allocations = sparse_allocations.to_dense()
+
+    cells = [[(valuations[i][j], float(allocations[i][j])) for j in range(num_items)] for i in range(num_players)]
+    row_order, column_order = canonical_order(cells)
+    rows = tuple(tuple(cells[i][j] for j in column_order) for i in row_order)
+    canonical_valuations = [[value for value, _ in row] for row in rows]
+    canonical_allocations = [[amount for _, amount in row] for row in rows]
+
+    return cache.get_or_compute("is_pareto_efficient", rows,
+                                lambda: economic_algo.is_pareto_efficient(canonical_valuations, canonical_allocations))
+
+
+def canonical_order(cells: List[List[tuple]]) -> Tuple[List[int], List[int]]:
+    """
+    An order of the rows and of the columns of a matrix that does not depend on how they were numbered.
+
+    Rows and columns are first ordered by the sorted multiset of their cells, which already tells apart the
+    rows and the columns of most instances. Rows (or columns) with the same multiset are then ordered by their
+    cells in the current order of the columns (or rows), until the order stops changing. Only instances with
+    symmetric rows or columns may still get more than one order, which costs a cache miss but never a wrong answer.
+
+    Examples:
+        >>> canonical_order([[3, 1], [2, 5], [4, 0]])
+        ([2, 0, 1], [1, 0])
+        >>> canonical_order([[4, 0], [3, 1], [2, 5]])
+        ([0, 1, 2], [1, 0])
+    """
+    num_rows = len(cells)
+    num_columns = len(cells[0]) if num_rows else 0
+    row_signatures = [tuple(sorted(row)) for row in cells]
+    column_signatures = [tuple(sorted(cells[i][j] for i in range(num_rows))) for j in range(num_columns)]
+
+    row_order = sorted(range(num_rows), key=lambda i: row_signatures[i])
+    column_order = sorted(range(num_columns), key=lambda j: column_signatures[j])
+    for _ in range(num_rows + num_columns):
+        new_column_order = sorted(column_order, key=lambda j: (column_signatures[j],
+                                                               tuple(cells[i][j] for i in row_order)))
+        new_row_order = sorted(row_order, key=lambda i: (row_signatures[i],
+                                                         tuple(cells[i][j] for j in new_column_order)))
+        if new_row_order == row_order and new_column_order == column_order:
+            break
+        row_order, column_order = new_row_order, new_column_order
+
+    return row_order, column_order
+
+
+def cached_vcg_payments(graph, source, target, cache: Optional[SolverCache] = None) -> Dict[Tuple[str, str], float]:
+    """
+    vcg_payments through the cache. The edges are oriented and sorted to get the canonical instance,
+    keeping the last weight of a repeated edge like the graph does.
+
+    The payments are computed on the graph as given, so a miss returns exactly what vcg_payments returns.
+    When the graph has several cheapest paths, NetworkX picks one by the order of the edges, so a hit
+    returns the payments for the path picked for the graph that filled the entry.
+
+    Examples:
+        >>> cache = SolverCache()
+        >>> graph = [('A', 'B', {'weight': 2}), ('B', 'C', {'weight': 1}), ('A', 'C', {'weight': 4})]
+        >>> cached_vcg_payments(graph, 'A', 'C', cache)
+        {('A', 'B'): 3, ('B', 'C'): 2}
+        >>> cached_vcg_payments(list(reversed(graph)), 'A', 'C', cache)
+        {('A', 'B'): 3, ('B', 'C'): 2}
+        >>> cache.stats()['hits']
+        1
+    """
+    cache = cache if cache is not None else shared_cache
+    graph = list(graph)
+
+    weights = {}
+    for u, v, data in graph:
+        weights[(u, v) if repr(u) <= repr(v) else (v, u)] = data['weight']
+    canonical_edges = tuple(sorted(((u, v, weight) for (u, v), weight in weights.items()), key=repr))
+
+    def compute():
+        payments = economic_algo.vcg_payments(graph, source, target)
+        # JSON has no tuple keys, so the payments are cached as [u, v, payment] triples
+        return [[u, v, payment] for (u, v), payment in payments.items()]
+
+    payments = cache.get_or_compute("vcg_payments", (canonical_edges, source, target), compute)
+    return {(node_label(u), node_label(v)): payment for u, v, payment in payments}
+
+
+def node_label(label):
+    """
+    A node label as it was before a trip through JSON, which turns tuple labels (like the nodes of
+    a grid graph) into lists. Lists cannot be node labels, so every list was a tuple.
+
+    Examples:
+        >>> node_label([0, [1, 2]]), node_label('A')
+        ((0, (1, 2)), 'A')
+    """
+    if isinstance(label, list):
+        return tuple(node_label(part) for part in label)
+    return label
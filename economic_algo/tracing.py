@@ -0,0 +1,89 @@
+"""
+Instrumentation of the solvers.
+
+The solvers take an optional tracer argument. Without a tracer they only pay a None check per layer
+(or per phase), and with one they report to it through three methods:
+
+- count(name, amount): add to a counter, like the number of Dijkstra runs.
+- lap(phase): add the time since the previous lap to a phase, like the expansion of a layer.
+  A solver starts with lap(None), which only restarts the clock.
+- layer(**fields): record the sizes of one layer of a state-space search.
+
+Tracer implements them by collecting everything, and forwards every event to an optional callback.
+Any object with these methods can be passed instead.
+"""
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+
+class Tracer:
+    """
+    Collect the counters, the phase timings and the layers reported by the solvers.
+
+    Parameters:
+        callback (Optional[Callable[[str, str, object], None]]): Called with the kind of every event
+            ("count", "lap" or "layer"), its name and its value.
+
+    Examples:
+        >>> import economic_algo
+        >>> tracer = Tracer()
+        >>> economic_algo.egalitarian_allocation([1.0, 4.0, 3.0], [6.0, 4.0, 6.0], tracer=tracer)
+        Player 0 gets items 1, 2 with value of 7.0
+        Player 1 gets items 0 with value of 6.0
+        >>> tracer.layers[-1]
+        {'item': 2, 'expanded': 4, 'pruned_by_pruning2': 3, 'pruned_by_pruning1': 0, 'frontier': 1}
+        >>> dict(tracer.counters)
+        {'states_expanded': 10, 'pruned_by_pruning2': 5, 'pruned_by_pruning1': 0}
+        >>> sorted(tracer.timings)
+        ['expand', 'pruning1', 'pruning2', 'setup']
+
+        >>> tracer = Tracer()
+        >>> improved = economic_algo.improve_pareto([[1, 3, 6], [3, 6, 1], [6, 1, 3]],
+        ...                                         [[0, 1, 0], [1, 0, 0], [0, 0, 1]], tracer=tracer)
+        >>> dict(tracer.counters)
+        {'pareto_checks': 2, 'bellman_ford_rounds': 2, 'trades': 1}
+
+        >>> events = []
+        >>> tracer = Tracer(callback=lambda kind, name, value: events.append((kind, name)))
+        >>> graph = [('A', 'B', {'weight': 2}), ('B', 'C', {'weight': 1}), ('A', 'C', {'weight': 4})]
+        >>> economic_algo.vcg_payments(graph, 'A', 'C', tracer=tracer)
+        {('A', 'B'): 3, ('B', 'C'): 2}
+        >>> [event for event in events if event[0] == "count"]
+        [('count', 'dijkstra_runs')]
+        >>> tracer.counters['dijkstra_runs']
+        2
+    """
+
+    def __init__(self, callback: Optional[Callable[[str, str, object], None]] = None):
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.timings: Dict[str, float] = defaultdict(float)
+        self.layers: List[dict] = []
+        self.callback = callback
+        self._last_time = time.perf_counter()
+
+    def count(self, name: str, amount: int = 1):
+        self.counters[name] += amount
+        if self.callback is not None:
+            self.callback("count", name, amount)
+
+    def lap(self, phase: Optional[str]):
+        now = time.perf_counter()
+        seconds = now - self._last_time
+        self._last_time = now
+        if phase is None:
+            return
+        self.timings[phase] += seconds
+        if self.callback is not None:
+            self.callback("lap", phase, seconds)
+
+    def layer(self, **fields):
+        self.layers.append(fields)
+        if self.callback is not None:
+            self.callback("layer", "layer", fields)
+
+    def report(self) -> dict:
+        """
+        Everything collected so far, as plain values.
+        """
+        return {'counters': dict(self.counters), 'timings': dict(self.timings), 'layers': list(self.layers)}
@@ -0,0 +1,7 @@
+"""
+The modules of VCG_Cheapst_Path, importable as economic_algo.vcg.<module> without adding the directory to sys.path.
+"""
+import os
+
+__path__.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                             "VCG_Cheapst_Path"))